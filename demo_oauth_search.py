@@ -4,13 +4,55 @@ OAuth 2.1 Search Demo
 Demonstrates the complete OAuth 2.1 flow with actual Slack message search
 """
 
-import requests
+import asyncio
+import httpx
 import secrets
 import hashlib
 import base64
 import json
 from urllib.parse import urlencode, parse_qs, urlparse
 
+try:
+    # orjson is an optional speedup; the stdlib encoder is used without it
+    import orjson
+    
+    def _encode_json(obj):
+        return orjson.dumps(obj)
+    
+    def _format_json(obj):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+except ImportError:
+    def _encode_json(obj):
+        return json.dumps(obj).encode()
+    
+    def _format_json(obj):
+        return json.dumps(obj, indent=2)
+
+# JSON-RPC requests for the argument-free tools never change, so build them once
+_CHANNELS_PAYLOAD = {
+    "jsonrpc": "2.0",
+    "method": "tools/call",
+    "params": {
+        "name": "get_slack_channels",
+        "arguments": {}
+    },
+    "id": 2
+}
+
+_STATS_PAYLOAD = {
+    "jsonrpc": "2.0",
+    "method": "tools/call",
+    "params": {
+        "name": "get_search_stats",
+        "arguments": {}
+    },
+    "id": 3
+}
+
+# Request bodies are sent pre-encoded (Content-Type is set in the headers)
+_CHANNELS_BODY = _encode_json(_CHANNELS_PAYLOAD)
+_STATS_BODY = _encode_json(_STATS_PAYLOAD)
+
 class MCPOAuthSearchDemo:
     def __init__(self, base_url="http://localhost:5000"):
         self.base_url = base_url
@@ -18,18 +60,35 @@ class MCPOAuthSearchDemo:
         self.client_secret = "mcp_client_secret_12345"
         self.redirect_uri = "http://localhost:3000/callback"
         self.access_token = None
+        self._auth_headers = None  # Set once the access token is obtained
         self.refresh_token = None
         self.code_verifier = None
+        
+        # One persistent client so every call reuses the same connection
+        try:
+            import h2  # noqa: F401 - HTTP/2 support is optional
+            self._http2 = True
+        except ImportError:
+            self._http2 = False
+        self._client = httpx.Client(base_url=base_url, http2=self._http2, timeout=10.0)
+    
+    def close(self):
+        """Close the underlying HTTP client"""
+        self._client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
     
     def generate_pkce(self):
         """Generate PKCE code verifier and challenge"""
-        self.code_verifier = base64.urlsafe_b64encode(
-            secrets.token_bytes(32)
-        ).decode('utf-8').rstrip('=')
+        # token_urlsafe already yields unpadded base64url text
+        self.code_verifier = secrets.token_urlsafe(32)
         
-        code_challenge = base64.urlsafe_b64encode(
-            hashlib.sha256(self.code_verifier.encode('utf-8')).digest()
-        ).decode('utf-8').rstrip('=')
+        digest = hashlib.sha256(self.code_verifier.encode('ascii')).digest()
+        code_challenge = base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
         
         return self.code_verifier, code_challenge
     
@@ -52,8 +111,7 @@ class MCPOAuthSearchDemo:
         }
         
         # Simulate authorization (auto-approve for demo)
-        response = requests.get(f"{self.base_url}/oauth/authorize", 
-                              params=params, allow_redirects=False)
+        response = self._client.get("/oauth/authorize", params=params)
         
         if response.status_code == 302:
             location = response.headers.get('Location')
@@ -74,11 +132,15 @@ class MCPOAuthSearchDemo:
             "code_verifier": self.code_verifier
         }
         
-        response = requests.post(f"{self.base_url}/oauth/token", data=data)
+        response = self._client.post("/oauth/token", data=data)
         response.raise_for_status()
         
         token_data = response.json()
         self.access_token = token_data["access_token"]
+        self._auth_headers = {
+            "Authorization": f"Bearer {self.access_token}",
+            "Content-Type": "application/json"
+        }
         self.refresh_token = token_data["refresh_token"]
         
         print(f"✅ Access token obtained")
@@ -87,17 +149,14 @@ class MCPOAuthSearchDemo:
         
         return token_data
     
-    def search_messages(self, query, top_k=5):
+    async def search_messages(self, query, top_k=5, client=None):
         """Search Slack messages using OAuth authenticated MCP"""
         if not self.access_token:
             raise ValueError("No access token - run get_oauth_token() first")
         
-        print(f"🔍 Searching for: '{query}'")
-        
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
+        if client is None:
+            async with httpx.AsyncClient(base_url=self.base_url, http2=self._http2, timeout=10.0) as client:
+                return await self.search_messages(query, top_k, client)
         
         payload = {
             "jsonrpc": "2.0",
@@ -112,11 +171,19 @@ class MCPOAuthSearchDemo:
             "id": 1
         }
         
-        response = requests.post(f"{self.base_url}/mcp", 
-                               headers=headers, json=payload)
+        response = await client.post("/mcp", headers=self._auth_headers, content=_encode_json(payload))
         response.raise_for_status()
         
-        result = response.json()
+        return response.json()
+    
+    async def search_many(self, queries, top_k=5):
+        """Run several searches concurrently over one async client, returning results in query order"""
+        async with httpx.AsyncClient(base_url=self.base_url, http2=self._http2, timeout=10.0) as client:
+            return await asyncio.gather(*(self.search_messages(query, top_k, client) for query in queries))
+    
+    def print_search_result(self, query, result):
+        """Print the outcome of one search"""
+        print(f"🔍 Searching for: '{query}'")
         
         if "result" in result:
             content = result["result"]["content"][0]["text"]
@@ -127,7 +194,7 @@ class MCPOAuthSearchDemo:
             return result
         else:
             print("❌ Search failed:")
-            print(json.dumps(result, indent=2))
+            print(_format_json(result))
             return result
     
     def get_channels(self):
@@ -137,23 +204,7 @@ class MCPOAuthSearchDemo:
         
         print("📺 Getting available channels...")
         
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "tools/call",
-            "params": {
-                "name": "get_slack_channels",
-                "arguments": {}
-            },
-            "id": 2
-        }
-        
-        response = requests.post(f"{self.base_url}/mcp", 
-                               headers=headers, json=payload)
+        response = self._client.post("/mcp", headers=self._auth_headers, content=_CHANNELS_BODY)
         response.raise_for_status()
         
         result = response.json()
@@ -165,7 +216,7 @@ class MCPOAuthSearchDemo:
             return result
         else:
             print("❌ Failed to get channels:")
-            print(json.dumps(result, indent=2))
+            print(_format_json(result))
             return result
     
     def get_stats(self):
@@ -175,23 +226,7 @@ class MCPOAuthSearchDemo:
         
         print("📊 Getting search statistics...")
         
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        
-        payload = {
-            "jsonrpc": "2.0",
-            "method": "tools/call",
-            "params": {
-                "name": "get_search_stats",
-                "arguments": {}
-            },
-            "id": 3
-        }
-        
-        response = requests.post(f"{self.base_url}/mcp", 
-                               headers=headers, json=payload)
+        response = self._client.post("/mcp", headers=self._auth_headers, content=_STATS_BODY)
         response.raise_for_status()
         
         result = response.json()
@@ -203,7 +238,7 @@ class MCPOAuthSearchDemo:
             return result
         else:
             print("❌ Failed to get statistics:")
-            print(json.dumps(result, indent=2))
+            print(_format_json(result))
             return result
     
     def run_demo(self):
@@ -233,9 +268,11 @@ class MCPOAuthSearchDemo:
                 "successful"
             ]
             
-            for query in search_queries:
+            # The searches are independent, so send them all at once
+            results = asyncio.run(self.search_many(search_queries, top_k=3))
+            for query, result in zip(search_queries, results):
                 print()
-                self.search_messages(query, top_k=3)
+                self.print_search_result(query, result)
                 print()
             
             print("🎉 Demo completed successfully!")
@@ -250,5 +287,5 @@ class MCPOAuthSearchDemo:
             traceback.print_exc()
 
 if __name__ == "__main__":
-    demo = MCPOAuthSearchDemo()
-    demo.run_demo()
\ No newline at end of file
+    with MCPOAuthSearchDemo() as demo:
+        demo.run_demo()
\ No newline at end of file
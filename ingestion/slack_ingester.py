@@ -4,57 +4,124 @@ Handles fetching messages from Slack API with endpoint-specific rate limiting an
 """
 
 import asyncio
+import heapq
+import json
+import logging
+import sqlite3
 import time
-from datetime import datetime, timezone, timedelta
-from typing import List, Dict, Optional, Set, Tuple
+from contextlib import closing
+from dataclasses import asdict
+from datetime import datetime, timezone
+from operator import attrgetter
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple
+import httpx
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+try:
+    # orjson decodes large history pages several times faster than the stdlib
+    from orjson import loads as _json_loads
+except ImportError:
+    from json import loads as _json_loads
 
 from lib.config import config
 from lib.data_models import SlackMessage, SlackChannel, SlackUser, SlackReaction
 from lib.rate_limiter import rate_limiter
 from lib.utils import SlackTextCleaner
 
+logger = logging.getLogger(__name__)
+
+_message_time = attrgetter("timestamp")
+
+def _file_title(file_data: Dict) -> str:
+    """Title of a shared file, falling back to its name only when no title key exists"""
+    return file_data['title'] if 'title' in file_data else file_data.get('name', '')
+
+_SUBTYPE_CONTENT_TYPES = ("list", "workflow", "post")
+_TEXT_FILE_TYPES = ("text", "plain", "markdown", "txt", "md")
+_CODE_FILE_TYPES = ("python", "javascript", "java", "cpp", "go", "rust", "php", "ruby")
+
+_SLACK_API_URL = "https://slack.com/api/"
+
+# High-volume read endpoints are called directly over async HTTP; everything
+# else goes through the slack_sdk WebClient
+_RAW_API_METHODS = {
+    "conversations_history": "conversations.history",
+    "conversations_replies": "conversations.replies",
+    "users_info": "users.info",
+}
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    expiry REAL NOT NULL,
+    PRIMARY KEY (kind, id)
+)
+"""
+
 class SlackIngester:
     def __init__(self):
+        config.validate_slack()
         self.client = WebClient(token=config.slack_bot_token)
-        # TTL-based caching: (data, timestamp)
-        self.users_cache: Dict[str, Tuple[SlackUser, datetime]] = {}
-        self.channels_cache: Dict[str, Tuple[SlackChannel, datetime]] = {}
+        # TTL-based caching: (data, time.monotonic() expiry)
+        self.users_cache: Dict[str, Tuple[SlackUser, float]] = {}
+        self.channels_cache: Dict[str, Tuple[SlackChannel, float]] = {}
+        # Raw conversations.info payloads from the latest get_channels_info call
+        self._channel_raw_cache: Dict[str, Dict] = {}
+        self.users_ttl_seconds = config.cache_users_hours * 3600
+        self.channels_ttl_seconds = config.cache_channels_hours * 3600
+        self.users_cache_max = config.cache_users_max
+        self.channels_cache_max = config.cache_channels_max
         # Text cleaner for processing messages
         self.text_cleaner = SlackTextCleaner(self.client)
+        # Async HTTP client for _RAW_API_METHODS (created on first use)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        # Rich content dispatch: file subtype/filetype -> (content_type, extractor)
+        self._rich_content_handlers = {
+            "slack_list": ("list", self._extract_list_content),
+            "workflow": ("workflow", self._extract_workflow_content),
+            "post": ("post", self._extract_post_content),
+        }
+        for file_type in _TEXT_FILE_TYPES:
+            self._rich_content_handlers[file_type] = ("file", self._extract_text_file_content)
+        for file_type in _CODE_FILE_TYPES:
+            self._rich_content_handlers[file_type] = ("file", self._extract_code_file_content)
+        # Warm the caches from the previous run
+        self._load_persistent_cache()
     
-    def _is_cache_valid(self, cached_time: datetime, ttl_hours: int) -> bool:
-        """Check if cached data is still valid"""
-        return datetime.now(timezone.utc) - cached_time < timedelta(hours=ttl_hours)
+    @staticmethod
+    def _cache_put(cache: Dict, key: str, value, ttl_seconds: float, max_size: int):
+        """Cache a value; over capacity, evict the entry closest to expiry"""
+        cache[key] = (value, time.monotonic() + ttl_seconds)
+        # Expired entries are left in place while there's room and are only
+        # replaced when read; this avoids sweeping entries that expire together
+        if len(cache) > max_size:
+            del cache[min(cache, key=lambda k: cache[k][1])]
     
-    def _cleanup_expired_cache(self):
-        """Remove expired entries from caches"""
-        now = datetime.now(timezone.utc)
-        
-        # Clean users cache
-        expired_users = [
-            user_id for user_id, (_, timestamp) in self.users_cache.items()
-            if not self._is_cache_valid(timestamp, config.cache_users_hours)
-        ]
-        for user_id in expired_users:
-            del self.users_cache[user_id]
-        
-        # Clean channels cache
-        expired_channels = [
-            channel_id for channel_id, (_, timestamp) in self.channels_cache.items()
-            if not self._is_cache_valid(timestamp, config.cache_channels_hours)
-        ]
-        for channel_id in expired_channels:
-            del self.channels_cache[channel_id]
-        
-        if expired_users or expired_channels:
-            print(f"Cleaned up {len(expired_users)} expired users and {len(expired_channels)} expired channels from cache")
+    @staticmethod
+    def _cache_put_many(cache: Dict, values: Dict, ttl_seconds: float, max_size: int):
+        """Cache several values with one shared expiry, then evict down to capacity"""
+        expires_at = time.monotonic() + ttl_seconds
+        cache.update({key: (value, expires_at) for key, value in values.items()})
+        excess = len(cache) - max_size
+        if excess > 0:
+            for key in heapq.nsmallest(excess, cache, key=lambda k: cache[k][1]):
+                del cache[key]
     
     async def _make_slack_api_call(self, method_name: str, **kwargs):
         """Make a Slack API call with enhanced rate limiting and error handling"""
-        # Get the method from the client
-        method = getattr(self.client, method_name)
+        api_method = _RAW_API_METHODS.get(method_name)
+        if api_method:
+            async def method(**call_kwargs):
+                return await self._raw_call(api_method, **call_kwargs)
+            # The rate limiter keys its limits and logs on the method name
+            method.__name__ = method_name
+        else:
+            # Get the method from the client
+            method = getattr(self.client, method_name)
         
         # Apply the enhanced rate limiting decorator
         rate_limited_method = rate_limiter.make_slack_api_call_rate_limited(method)
@@ -62,6 +129,93 @@ class SlackIngester:
         # Make the call with comprehensive error handling
         return await rate_limited_method(**kwargs)
     
+    async def _raw_call(self, api_method: str, **params) -> SlackResponse:
+        """POST a Web API method directly and wrap the result like WebClient does"""
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(
+                headers={"Authorization": f"Bearer {config.slack_bot_token}"},
+                timeout=httpx.Timeout(30.0)
+            )
+        
+        url = _SLACK_API_URL + api_method
+        response = await self._http_client.post(url, data=params)
+        
+        try:
+            data = _json_loads(response.content)
+        except ValueError:
+            # Edge errors such as 502/503 come back as HTML; a failed response carrying the
+            # status lets validate() raise and the rate limiter retry, as with WebClient
+            data = {"ok": False, "error": f"http_{response.status_code}", "status": response.status_code}
+        
+        # SlackResponse.validate() raises SlackApiError exactly as for WebClient calls,
+        # so the rate limiter's retry handling applies unchanged
+        return SlackResponse(
+            client=self.client,
+            http_verb="POST",
+            api_url=url,
+            req_args={"data": params},
+            data=data,
+            headers=response.headers,
+            status_code=response.status_code
+        )
+    
+    def _load_persistent_cache(self):
+        """Restore unexpired users and channels saved by a previous run"""
+        try:
+            with closing(sqlite3.connect(config.slack_cache_path)) as db:
+                db.execute(_CACHE_SCHEMA)
+                rows = db.execute("SELECT kind, id, blob, expiry FROM cache WHERE expiry > ?", (time.time(),)).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not load Slack cache from {config.slack_cache_path}: {e}")
+            return
+        
+        # Stored expiries are wall-clock times; convert the remaining TTL back to monotonic
+        offset = time.monotonic() - time.time()
+        for kind, key, blob, expiry in rows:
+            data = _json_loads(blob)
+            if kind == "user":
+                self.users_cache[key] = (SlackUser(**data), expiry + offset)
+            elif kind == "channel":
+                data['created'] = datetime.fromisoformat(data['created'])
+                self.channels_cache[key] = (SlackChannel(**data), expiry + offset)
+        
+        if rows:
+            logger.info(f"Loaded {len(self.users_cache)} users and {len(self.channels_cache)} channels from the Slack cache")
+    
+    async def save_persistent_cache(self):
+        """Save the user and channel caches so the next run starts warm"""
+        offset = time.time() - time.monotonic()
+        rows = [
+            ("user", key, json.dumps(asdict(user)), expires_at + offset)
+            for key, (user, expires_at) in self.users_cache.items()
+        ]
+        rows.extend(
+            ("channel", key, json.dumps({**asdict(channel), "created": channel.created.isoformat()}), expires_at + offset)
+            for key, (channel, expires_at) in self.channels_cache.items()
+        )
+        # Rows are built on the event loop so the caches aren't read while changing
+        await asyncio.to_thread(self._write_persistent_cache, rows)
+    
+    @staticmethod
+    def _write_persistent_cache(rows: List[Tuple[str, str, str, float]]):
+        """Replace the stored cache with rows in one transaction"""
+        try:
+            with closing(sqlite3.connect(config.slack_cache_path)) as db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(_CACHE_SCHEMA)
+                with db:
+                    db.execute("DELETE FROM cache")
+                    db.executemany("INSERT INTO cache (kind, id, blob, expiry) VALUES (?, ?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not save Slack cache to {config.slack_cache_path}: {e}")
+    
+    async def close(self):
+        """Save the caches and close the async HTTP client"""
+        await self.save_persistent_cache()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
     async def get_channels_info(self) -> List[SlackChannel]:
         """Get information about configured channels"""
         channels = []
@@ -70,6 +224,7 @@ class SlackIngester:
             try:
                 response = await self._make_slack_api_call("conversations_info", channel=channel_id)
                 channel_data = response['channel']
+                self._channel_raw_cache[channel_id] = channel_data
                 
                 channel = SlackChannel(
                     id=channel_data['id'],
@@ -81,21 +236,27 @@ class SlackIngester:
                 )
                 
                 channels.append(channel)
-                self.channels_cache[channel.id] = (channel, datetime.now(timezone.utc))
+                self._cache_put(self.channels_cache, channel.id, channel, self.channels_ttl_seconds, self.channels_cache_max)
                 
             except SlackApiError as e:
-                print(f"Error getting channel info for {channel_id}: {e}")
+                logger.error(f"Error getting channel info for {channel_id}: {e}")
                 continue
         
         return channels
     
     async def get_user_info(self, user_id: str) -> Optional[SlackUser]:
         """Get user information, with caching"""
-        if user_id in self.users_cache:
-            cached_user, cached_time = self.users_cache[user_id]
-            if self._is_cache_valid(cached_time, config.cache_users_hours):
-                return cached_user
-        
+        cached = self.users_cache.get(user_id)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        
+        user = await self._fetch_user(user_id)
+        if user:
+            self._cache_put(self.users_cache, user_id, user, self.users_ttl_seconds, self.users_cache_max)
+        return user
+    
+    async def _fetch_user(self, user_id: str) -> Optional[SlackUser]:
+        """Fetch user information from Slack without touching the cache"""
         try:
             response = await self._make_slack_api_call("users_info", user=user_id)
             user_data = response['user']
@@ -108,24 +269,56 @@ class SlackIngester:
                 email=user_data.get('profile', {}).get('email')
             )
             
-            self.users_cache[user_id] = (user, datetime.now(timezone.utc))
             return user
             
         except SlackApiError as e:
-            print(f"Error getting user info for {user_id}: {e}")
+            logger.error(f"Error getting user info for {user_id}: {e}")
             return None
     
+    async def _prefetch_users(self, messages: List[Dict]):
+        """Resolve every uncached author and reaction user in a batch of raw messages concurrently"""
+        user_ids: Set[str] = set()
+        for msg_data in messages:
+            user_id = msg_data.get('user')
+            if user_id:
+                user_ids.add(user_id)
+            for reaction_data in msg_data.get('reactions', []):
+                user_ids.update(reaction_data.get('users', []))
+        
+        now = time.monotonic()
+        cache = self.users_cache
+        missing = [user_id for user_id in user_ids if user_id not in cache or cache[user_id][1] <= now]
+        if not missing:
+            return
+        
+        semaphore = asyncio.Semaphore(config.user_fetch_concurrency)
+        
+        async def fetch(user_id: str) -> Optional[SlackUser]:
+            async with semaphore:
+                return await self._fetch_user(user_id)
+        
+        users = await asyncio.gather(*(fetch(user_id) for user_id in missing))
+        
+        # Cache the whole batch in one update with a single expiry timestamp
+        resolved = {user_id: user for user_id, user in zip(missing, users) if user}
+        self._cache_put_many(self.users_cache, resolved, self.users_ttl_seconds, self.users_cache_max)
+    
     async def get_channel_messages(self, channel_id: str, oldest: Optional[str] = None, 
                                  latest: Optional[str] = None, limit: int = 10000) -> List[SlackMessage]:
         """Get messages from a channel with pagination - optimized for maximum efficiency"""
-        all_messages = []
+        return [message async for message in self.iter_channel_messages(channel_id, oldest, latest, limit)]
+    
+    async def iter_channel_messages(self, channel_id: str, oldest: Optional[str] = None,
+                                    latest: Optional[str] = None, limit: int = 10000) -> AsyncIterator[SlackMessage]:
+        """Yield a channel's messages (newest first) as each history page is converted"""
+        count = 0
         cursor = None
         target_limit = limit
         
         while True:
             try:
                 # Always use max 1000 per request for efficiency unless we need fewer
-                batch_size = min(1000, target_limit - len(all_messages))
+                batch_size = min(1000, target_limit - count)
                 if batch_size <= 0:
                     break
                 
@@ -144,22 +337,24 @@ class SlackIngester:
                 response = await self._make_slack_api_call("conversations_history", **kwargs)
                 messages = response['messages']
                 
+                # Resolve authors and reaction users up front so conversion hits the cache
+                await self._prefetch_users(messages)
+                
                 # Process messages
                 for msg_data in messages:
                     message = await self._convert_message_data(msg_data, channel_id)
                     if message:
-                        all_messages.append(message)
+                        count += 1
+                        yield message
                 
                 # Check for pagination
                 cursor = response.get('response_metadata', {}).get('next_cursor')
-                if not cursor or len(all_messages) >= target_limit:
+                if not cursor or count >= target_limit:
                     break
                     
             except SlackApiError as e:
-                print(f"Error getting messages for channel {channel_id}: {e}")
+                logger.error(f"Error getting messages for channel {channel_id}: {e}")
                 break
-        
-        return all_messages
     
     async def get_thread_replies(self, channel_id: str, thread_ts: str) -> List[SlackMessage]:
         """Get replies in a thread"""
@@ -171,13 +366,15 @@ class SlackIngester:
                                                      ts=thread_ts)
             
             # Skip the first message (thread parent) and process replies
-            for msg_data in response['messages'][1:]:
+            reply_data = response['messages'][1:]
+            await self._prefetch_users(reply_data)
+            for msg_data in reply_data:
                 reply = await self._convert_message_data(msg_data, channel_id)
                 if reply:
                     replies.append(reply)
                     
         except SlackApiError as e:
-            print(f"Error getting thread replies for {thread_ts}: {e}")
+            logger.error(f"Error getting thread replies for {thread_ts}: {e}")
         
         return replies
     
@@ -188,11 +385,14 @@ class SlackIngester:
         if rich_content:
             return rich_content
             
+        get = msg_data.get
+        
         # Skip messages without text or from bots
-        if not msg_data.get('text') or msg_data.get('subtype') == 'bot_message':
+        text = get('text')
+        if not text or get('subtype') == 'bot_message':
             return None
         
-        user_id = msg_data.get('user')
+        user_id = get('user')
         if not user_id:
             return None
         
@@ -206,42 +406,45 @@ class SlackIngester:
         channel_name = channel[0].name if channel else channel_id
         
         # Convert timestamp
-        timestamp = datetime.fromtimestamp(float(msg_data['ts']), tz=timezone.utc)
+        ts = msg_data['ts']
+        timestamp = datetime.fromtimestamp(float(ts), tz=timezone.utc)
         
         # Clean and process the message text
-        raw_text = msg_data['text']
-        cleaned_text = await self.text_cleaner.index_clean(raw_text)
+        cleaned_text = await self.text_cleaner.index_clean(text)
         
-        # Process reactions
+        # Process reactions; reaction users were prefetched with the page, so
+        # names come straight from the cache (falling back to the raw ID)
+        users_cache = self.users_cache
         reactions = []
-        for reaction_data in msg_data.get('reactions', []):
-            # Resolve user IDs to usernames for reactions
+        for reaction_data in get('reactions', ()):
+            reaction_users = tuple(reaction_data.get('users', ()))
             user_names = []
-            for user_id in reaction_data.get('users', []):
-                user_info = await self.get_user_info(user_id)
-                user_names.append(user_info.name if user_info else user_id)
+            for reaction_user_id in reaction_users:
+                cached = users_cache.get(reaction_user_id)
+                user_names.append(cached[0].name if cached else reaction_user_id)
             
-            reaction = SlackReaction(
+            reactions.append(SlackReaction(
                 name=reaction_data['name'],
                 count=reaction_data['count'],
-                users=reaction_data['users'],
-                user_names=user_names
-            )
-            reactions.append(reaction)
+                users=reaction_users,
+                user_names=tuple(user_names)
+            ))
         
         # Create message
+        thread_ts = get('thread_ts')
+        reply_count = get('reply_count', 0)
         message = SlackMessage(
-            id=msg_data['ts'],
+            id=ts,
             text=cleaned_text,
             user_id=user_id,
             user_name=user.name,
             channel_id=channel_id,
             channel_name=channel_name,
             timestamp=timestamp,
-            thread_ts=msg_data.get('thread_ts'),
-            reply_count=msg_data.get('reply_count', 0),
+            thread_ts=thread_ts,
+            reply_count=reply_count,
             reactions=reactions,
-            is_thread_parent=bool(msg_data.get('reply_count', 0) > 0 and not msg_data.get('thread_ts')),
+            is_thread_parent=bool(reply_count > 0 and not thread_ts),
             content_type="message"
         )
         
@@ -249,61 +452,96 @@ class SlackIngester:
     
     async def get_all_messages_since(self, since_timestamp: Optional[datetime] = None) -> List[SlackMessage]:
         """Get all messages from all configured channels since a given timestamp"""
-        all_messages = []
         oldest = str(since_timestamp.timestamp()) if since_timestamp else None
         
-        # Clean up expired cache entries first
-        self._cleanup_expired_cache()
-        
         # First get channel info
         await self.get_channels_info()
         
-        for channel_id in config.slack_channels:
-            print(f"Ingesting messages from channel {channel_id}")
+        semaphore = asyncio.Semaphore(config.channel_concurrency)
+        
+        async def ingest(channel_id: str) -> List[SlackMessage]:
+            async with semaphore:
+                return await self._ingest_channel(channel_id, oldest)
+        
+        # Channels are independent; the rate limiter still spaces calls per endpoint
+        channel_results = await asyncio.gather(*(ingest(channel_id) for channel_id in config.slack_channels))
+        
+        # Persist what this cycle resolved so a restart doesn't refetch it
+        await self.save_persistent_cache()
+        
+        # Each channel comes back in chronological order, so merge rather than re-sort everything
+        return list(heapq.merge(*channel_results, key=_message_time))
+    
+    async def iter_messages_since(self, since_timestamp: Optional[datetime] = None) -> AsyncIterator[List[SlackMessage]]:
+        """Yield each configured channel's messages since a given timestamp as soon as that channel finishes"""
+        oldest = str(since_timestamp.timestamp()) if since_timestamp else None
+        
+        await self.get_channels_info()
+        
+        semaphore = asyncio.Semaphore(config.channel_concurrency)
+        
+        async def ingest(channel_id: str) -> List[SlackMessage]:
+            async with semaphore:
+                return await self._ingest_channel(channel_id, oldest)
+        
+        tasks = [asyncio.create_task(ingest(channel_id)) for channel_id in config.slack_channels]
+        try:
+            for next_channel in asyncio.as_completed(tasks):
+                yield await next_channel
+        finally:
+            # Don't leave channels ingesting if the consumer stops early
+            for task in tasks:
+                task.cancel()
+        
+        await self.save_persistent_cache()
+    
+    async def _ingest_channel(self, channel_id: str, oldest: Optional[str]) -> List[SlackMessage]:
+        """Get top-level messages (with thread replies nested) and canvas content for one channel"""
+        logger.info(f"Ingesting messages from channel {channel_id}")
+        
+        try:
+            # Get channel messages
+            messages = await self.get_channel_messages(channel_id, oldest=oldest)
             
-            try:
-                # Get channel messages
-                messages = await self.get_channel_messages(channel_id, oldest=oldest)
-                
-                # Create a set to track which messages are thread replies
-                thread_reply_ids = set()
-                
-                # For each message that has replies, get the thread
-                for message in messages:
-                    if message.is_thread_parent and message.reply_count > 0:
-                        try:
-                            thread_replies = await self.get_thread_replies(channel_id, message.id)
-                            message.thread_replies = thread_replies
-                            # Track thread reply IDs to avoid duplicates
-                            for reply in thread_replies:
-                                thread_reply_ids.add(reply.id)
-                        except Exception as e:
-                            print(f"Error getting thread replies for {message.id}: {e}")
-                
-                # Filter out thread replies from main message list (they're nested under parents)
-                top_level_messages = [msg for msg in messages if msg.id not in thread_reply_ids]
-                
-                # Get canvas content for the channel
-                canvas_messages = await self.get_channel_canvas_content(channel_id)
-                all_messages.extend(canvas_messages)
-                
-                all_messages.extend(top_level_messages)
-                
-                total_thread_replies = sum(len(msg.thread_replies) for msg in top_level_messages)
-                print(f"Successfully processed {len(top_level_messages)} top-level messages, {total_thread_replies} thread replies, and {len(canvas_messages)} canvas items from {channel_id}")
-                
-            except Exception as e:
-                print(f"Error processing channel {channel_id}: {e}")
-                print(f"Skipping channel {channel_id} and continuing...")
-                continue
+            # Create a set to track which messages are thread replies
+            thread_reply_ids = set()
             
-            # Add a small delay between channels to be respectful
-            await asyncio.sleep(1)
-        
-        # Sort messages chronologically
-        all_messages.sort(key=lambda m: m.timestamp)
+            # Fetch the replies of every thread parent concurrently
+            parents = [message for message in messages if message.is_thread_parent and message.reply_count > 0]
+            semaphore = asyncio.Semaphore(config.thread_concurrency)
+            
+            async def fetch_replies(message: SlackMessage) -> List[SlackMessage]:
+                async with semaphore:
+                    try:
+                        return await self.get_thread_replies(channel_id, message.id)
+                    except Exception as e:
+                        logger.error(f"Error getting thread replies for {message.id}: {e}")
+                        return []
+            
+            for message, thread_replies in zip(parents, await asyncio.gather(*(fetch_replies(m) for m in parents))):
+                message.thread_replies = thread_replies
+                # Track thread reply IDs to avoid duplicates
+                for reply in thread_replies:
+                    thread_reply_ids.add(reply.id)
+            
+            # Filter out thread replies from main message list (they're nested under parents)
+            top_level_messages = [msg for msg in messages if msg.id not in thread_reply_ids]
+            
+            # Get canvas content for the channel
+            canvas_messages = await self.get_channel_canvas_content(channel_id)
+            
+            total_thread_replies = sum(len(msg.thread_replies) for msg in top_level_messages)
+            logger.info(f"Successfully processed {len(top_level_messages)} top-level messages, {total_thread_replies} thread replies, and {len(canvas_messages)} canvas items from {channel_id}")
+            
+            # History arrives newest first, so this sort is mostly a cheap run reversal
+            channel_messages = canvas_messages + top_level_messages
+            channel_messages.sort(key=_message_time)
+            return channel_messages
         
-        return all_messages
+        except Exception as e:
+            logger.error(f"Error processing channel {channel_id}: {e}")
+            logger.warning(f"Skipping channel {channel_id} and continuing...")
+            return []
     
     async def get_latest_message_timestamp(self, channel_id: str) -> Optional[datetime]:
         """Get the timestamp of the latest message in a channel"""
@@ -317,7 +555,7 @@ class SlackIngester:
                 return datetime.fromtimestamp(float(latest_ts), tz=timezone.utc)
                 
         except SlackApiError as e:
-            print(f"Error getting latest message timestamp for {channel_id}: {e}")
+            logger.error(f"Error getting latest message timestamp for {channel_id}: {e}")
         
         return None
     
@@ -326,9 +564,11 @@ class SlackIngester:
         canvas_messages = []
         
         try:
-            # Get channel info to find canvas files
-            response = await self._make_slack_api_call("conversations_info", channel=channel_id)
-            channel_data = response.get('channel', {})
+            # Get channel info to find canvas files, reusing this cycle's get_channels_info payload
+            channel_data = self._channel_raw_cache.get(channel_id)
+            if channel_data is None:
+                response = await self._make_slack_api_call("conversations_info", channel=channel_id)
+                channel_data = response.get('channel', {})
             
             # Check if channel has canvas in properties
             properties = channel_data.get('properties', {})
@@ -367,13 +607,13 @@ class SlackIngester:
                         )
                         
                         canvas_messages.append(canvas_message)
-                        print(f"Successfully extracted canvas content: {file_data.get('title', 'Untitled')}")
+                        logger.debug("Successfully extracted canvas content: %s", file_data.get('title', 'Untitled'))
                     
                 except Exception as e:
-                    print(f"Error extracting canvas {canvas_file_id}: {e}")
+                    logger.error(f"Error extracting canvas {canvas_file_id}: {e}")
                     
         except Exception as e:
-            print(f"Error getting canvas content for channel {channel_id}: {e}")
+            logger.error(f"Error getting canvas content for channel {channel_id}: {e}")
             
         return canvas_messages
     
@@ -397,11 +637,12 @@ class SlackIngester:
                                 content_parts.append(text_element.get('text', ''))
         
         # Add basic file info
-        if file_data.get('size'):
-            content_parts.append(f"Canvas size: {file_data['size']} bytes")
+        size = file_data.get('size')
+        if size:
+            content_parts.append(f"Canvas size: {size} bytes")
         
-        if file_data.get('canvas_readtime'):
-            read_time = file_data['canvas_readtime']
+        read_time = file_data.get('canvas_readtime')
+        if read_time:
             content_parts.append(f"Estimated read time: {read_time:.1f} minutes")
         
         # Add editor information (resolve user IDs to names)
@@ -422,38 +663,16 @@ class SlackIngester:
         files = msg_data.get('files', [])
         
         for file_data in files:
-            file_type = file_data.get('filetype', '')
-            subtype = file_data.get('subtype', '')
-            mimetype = file_data.get('mimetype', '')
-            
-            # Handle different rich content types
-            content_type = "file"
-            content_text = ""
-            
-            # Slack Lists
-            if subtype == "slack_list" or file_type == "slack_list":
-                content_type = "list"
-                content_text = await self._extract_list_content(file_data)
-            
-            # Slack Workflows  
-            elif subtype == "workflow" or file_type == "workflow":
-                content_type = "workflow"
-                content_text = await self._extract_workflow_content(file_data)
-            
-            # Slack Posts
-            elif subtype == "post" or file_type == "post":
-                content_type = "post"
-                content_text = await self._extract_post_content(file_data)
-            
-            # Text files and documents
-            elif file_type in ["text", "plain", "markdown", "txt", "md"]:
-                content_type = "file"
-                content_text = await self._extract_text_file_content(file_data)
+            # Slack lists, workflows and posts can be flagged by subtype or
+            # filetype; text and code files only by filetype
+            handler = self._rich_content_handlers.get(file_data.get('subtype', ''))
+            if handler is None or handler[0] not in _SUBTYPE_CONTENT_TYPES:
+                handler = self._rich_content_handlers.get(file_data.get('filetype', ''))
+            if handler is None:
+                continue
             
-            # Code files
-            elif file_type in ["python", "javascript", "java", "cpp", "go", "rust", "php", "ruby"]:
-                content_type = "file"
-                content_text = await self._extract_code_file_content(file_data)
+            content_type, extract = handler
+            content_text = await extract(file_data)
                 
             # Skip if no meaningful content
             if not content_text or len(content_text.strip()) < 10:
@@ -493,7 +712,7 @@ class SlackIngester:
         content_parts = []
         
         # Add list title
-        title = file_data.get('title', file_data.get('name', ''))
+        title = _file_title(file_data)
         if title:
             content_parts.append(f"List Title: {title}")
         
@@ -503,8 +722,9 @@ class SlackIngester:
             content_parts.append(f"List Items:\n{preview}")
         
         # Add list metadata
-        if file_data.get('size'):
-            content_parts.append(f"List size: {file_data['size']} bytes")
+        size = file_data.get('size')
+        if size:
+            content_parts.append(f"List size: {size} bytes")
             
         return "\n".join(content_parts)
     
@@ -513,7 +733,7 @@ class SlackIngester:
         content_parts = []
         
         # Add workflow title
-        title = file_data.get('title', file_data.get('name', ''))
+        title = _file_title(file_data)
         if title:
             content_parts.append(f"Workflow Title: {title}")
         
@@ -523,8 +743,9 @@ class SlackIngester:
             content_parts.append(f"Workflow Description:\n{preview}")
         
         # Add workflow metadata
-        if file_data.get('app_name'):
-            content_parts.append(f"App: {file_data['app_name']}")
+        app_name = file_data.get('app_name')
+        if app_name:
+            content_parts.append(f"App: {app_name}")
             
         return "\n".join(content_parts)
     
@@ -533,7 +754,7 @@ class SlackIngester:
         content_parts = []
         
         # Add post title
-        title = file_data.get('title', file_data.get('name', ''))
+        title = _file_title(file_data)
         if title:
             content_parts.append(f"Post Title: {title}")
         
@@ -543,8 +764,9 @@ class SlackIngester:
             content_parts.append(f"Post Content:\n{preview}")
         
         # Add post metadata
-        if file_data.get('size'):
-            content_parts.append(f"Post size: {file_data['size']} bytes")
+        size = file_data.get('size')
+        if size:
+            content_parts.append(f"Post size: {size} bytes")
             
         return "\n".join(content_parts)
     
@@ -553,7 +775,7 @@ class SlackIngester:
         content_parts = []
         
         # Add file title
-        title = file_data.get('title', file_data.get('name', ''))
+        title = _file_title(file_data)
         if title:
             content_parts.append(f"File: {title}")
         
@@ -563,10 +785,12 @@ class SlackIngester:
             content_parts.append(f"Content:\n{preview}")
         
         # Add file metadata
-        if file_data.get('filetype'):
-            content_parts.append(f"File type: {file_data['filetype']}")
-        if file_data.get('size'):
-            content_parts.append(f"Size: {file_data['size']} bytes")
+        filetype = file_data.get('filetype')
+        if filetype:
+            content_parts.append(f"File type: {filetype}")
+        size = file_data.get('size')
+        if size:
+            content_parts.append(f"Size: {size} bytes")
             
         return "\n".join(content_parts)
     
@@ -575,7 +799,7 @@ class SlackIngester:
         content_parts = []
         
         # Add file title
-        title = file_data.get('title', file_data.get('name', ''))
+        title = _file_title(file_data)
         if title:
             content_parts.append(f"Code File: {title}")
         
@@ -585,11 +809,14 @@ class SlackIngester:
             content_parts.append(f"Code:\n{preview}")
         
         # Add code metadata
-        if file_data.get('filetype'):
-            content_parts.append(f"Language: {file_data['filetype']}")
-        if file_data.get('lines'):
-            content_parts.append(f"Lines: {file_data['lines']}")
-        if file_data.get('size'):
-            content_parts.append(f"Size: {file_data['size']} bytes")
+        filetype = file_data.get('filetype')
+        if filetype:
+            content_parts.append(f"Language: {filetype}")
+        lines = file_data.get('lines')
+        if lines:
+            content_parts.append(f"Lines: {lines}")
+        size = file_data.get('size')
+        if size:
+            content_parts.append(f"Size: {size} bytes")
             
         return "\n".join(content_parts) 
\ No newline at end of file
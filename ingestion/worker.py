@@ -4,6 +4,7 @@ Runs as a standalone background process to ingest Slack messages
 """
 
 import asyncio
+import logging
 import signal
 import sys
 import time
@@ -18,10 +19,12 @@ from lib.data_models import IngestionLog
 from lib.embedding_service import EmbeddingService
 from lib.pinecone_service import PineconeService
 from lib.notion_logger import NotionLogger
-from lib.utils import get_current_utc_time, save_state, load_state, format_duration
+from lib.utils import get_current_utc_time, save_state, load_state, format_duration, setup_logging
 
 from .slack_ingester import SlackIngester
 
+logger = logging.getLogger(__name__)
+
 
 class SlackIngestionWorker:
     """Dedicated worker for ingesting Slack messages"""
@@ -35,7 +38,9 @@ class SlackIngestionWorker:
         
         self.is_initial_ingestion_complete = False
         self.initial_ingestion_task = None
+        self.refresh_task: Optional[asyncio.Task] = None
         self.running = False
+        self._stop_event: Optional[asyncio.Event] = None  # Created in start() on the running loop
         
         # Load previous state
         self._load_state()
@@ -55,27 +60,29 @@ class SlackIngestionWorker:
     
     async def start(self):
         """Start the ingestion worker"""
-        print("=" * 60)
-        print("🚀 Slack Message Ingestion Worker Starting")
-        print("=" * 60)
-        print(f"📅 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"📺 Monitoring {len(config.slack_channels)} Slack channel(s)")
-        print(f"🔄 Refresh interval: {config.refresh_interval_hours} hour(s)")
-        print("=" * 60)
+        logger.info("🚀 Slack Message Ingestion Worker Starting")
+        logger.info("📺 Monitoring %d Slack channel(s)", len(config.slack_channels))
+        logger.info("🔄 Refresh interval: %d hour(s)", config.refresh_interval_hours)
         
-        # Validate configuration
+        # Validate the Slack, Pinecone and Notion settings (core settings are checked on load)
         try:
             config._validate_config()
-            print("✅ Configuration validated")
+            logger.info("✅ Configuration validated")
         except ValueError as e:
-            print(f"❌ Configuration error: {e}")
+            logger.error("❌ Configuration error: %s", e)
             sys.exit(1)
         
         self.running = True
+        self._stop_event = asyncio.Event()
         
-        # Set up signal handlers for graceful shutdown
+        # Set up signal handlers for graceful shutdown; the loop's own handlers run
+        # on the loop, and the plain signal module fallback (Windows) hands off to it
+        loop = asyncio.get_running_loop()
         for sig in [signal.SIGINT, signal.SIGTERM]:
-            signal.signal(sig, self._signal_handler)
+            try:
+                loop.add_signal_handler(sig, self._signal_handler, sig, None)
+            except NotImplementedError:
+                signal.signal(sig, lambda signum, frame: loop.call_soon_threadsafe(self._signal_handler, signum, frame))
         
         try:
             # Verify Notion database schema
@@ -86,41 +93,41 @@ class SlackIngestionWorker:
             
             # Check if we need to do initial ingestion
             if not self.is_initial_ingestion_complete or self.pinecone_service.is_index_empty():
-                print("Starting initial ingestion...")
+                logger.info("Starting initial ingestion...")
                 self.initial_ingestion_task = asyncio.create_task(self.initial_ingestion())
             else:
-                print("Initial ingestion already complete, scheduling hourly refreshes")
+                logger.info("Initial ingestion already complete, scheduling hourly refreshes")
                 self._schedule_hourly_refresh()
             
-            # Keep the worker running
-            while self.running:
-                await asyncio.sleep(1)
+            # Keep the worker running until a shutdown signal sets the stop event
+            await self._stop_event.wait()
                 
         except KeyboardInterrupt:
-            print("\n🛑 Received interrupt signal")
+            logger.info("🛑 Received interrupt signal")
         except Exception as e:
-            print(f"❌ Worker error: {e}")
+            logger.error("❌ Worker error: %s", e)
         finally:
             await self.stop()
     
     def _signal_handler(self, signum, frame):
         """Handle shutdown signals"""
-        print(f"\n🛑 Received signal {signum}")
+        logger.info("🛑 Received signal %s", signum)
         self.running = False
+        self._stop_event.set()
     
     def _schedule_hourly_refresh(self):
         """Schedule hourly refresh job"""
         self.scheduler.add_job(
-            self.hourly_refresh,
+            self._run_refresh,
             trigger=IntervalTrigger(hours=config.refresh_interval_hours),
             id='hourly_refresh',
             replace_existing=True
         )
-        print(f"Scheduled hourly refresh every {config.refresh_interval_hours} hour(s)")
+        logger.info("Scheduled hourly refresh every %d hour(s)", config.refresh_interval_hours)
     
     async def initial_ingestion(self):
         """Perform initial full ingestion of all messages"""
-        start_time = time.time()
+        start_time = time.monotonic()
         log = IngestionLog(
             timestamp=get_current_utc_time(),
             operation="initial_ingestion",
@@ -130,28 +137,39 @@ class SlackIngestionWorker:
         )
         
         try:
-            print("Starting initial ingestion of all Slack messages...")
+            logger.info("Starting initial ingestion of all Slack messages...")
             
-            # Get all messages (no time filter for initial ingestion)
-            all_messages = await self.slack_ingester.get_all_messages_since(None)
-            log.messages_processed = len(all_messages)
-            log.channels_processed = len(config.slack_channels)
+            # Stream channels through embedding and upsert so memory stays bounded by
+            # a few batches and the stages overlap (no time filter for initial ingestion)
+            batch_size = config.ingest_pipeline_batch_size
+            message_queue = asyncio.Queue(maxsize=config.ingest_pipeline_queue_size)
+            embedding_queue = asyncio.Queue(maxsize=config.ingest_pipeline_queue_size)
             
-            print(f"Retrieved {len(all_messages)} messages from {len(config.slack_channels)} channels")
+            async def fetch_messages():
+                async for channel_messages in self.slack_ingester.iter_messages_since(None):
+                    log.channels_processed += 1
+                    for start in range(0, len(channel_messages), batch_size):
+                        await message_queue.put(channel_messages[start:start + batch_size])
+                await message_queue.put(None)
             
-            if all_messages:
-                # Generate embeddings
-                print("Generating embeddings...")
-                embeddings_data = await self.embedding_service.generate_embeddings(all_messages)
-                log.embeddings_generated = len(embeddings_data)
-                
-                print(f"Generated {len(embeddings_data)} embeddings")
-                
-                # Store in vector database
-                print("Storing embeddings in vector database...")
-                await self.pinecone_service.upsert_embeddings(embeddings_data)
-                
-                print("Initial ingestion complete!")
+            async def embed_messages():
+                while (messages := await message_queue.get()) is not None:
+                    log.messages_processed += len(messages)
+                    embeddings_data = await self.embedding_service.generate_embeddings(messages)
+                    log.embeddings_generated += len(embeddings_data)
+                    await embedding_queue.put(embeddings_data)
+                await embedding_queue.put(None)
+            
+            async def store_embeddings():
+                while (embeddings_data := await embedding_queue.get()) is not None:
+                    await self.pinecone_service.upsert_embeddings(embeddings_data)
+                    logger.info("Progress: %d/%d channels, %d messages, %d embeddings",
+                                log.channels_processed, len(config.slack_channels),
+                                log.messages_processed, log.embeddings_generated)
+            
+            await self._run_pipeline(fetch_messages(), embed_messages(), store_embeddings())
+            
+            logger.info("Initial ingestion complete! Retrieved %d messages from %d channels", log.messages_processed, log.channels_processed)
             
             # Mark initial ingestion as complete
             self.is_initial_ingestion_complete = True
@@ -164,18 +182,28 @@ class SlackIngestionWorker:
             
         except Exception as e:
             error_msg = f"Initial ingestion failed: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             log.errors.append(error_msg)
             log.success = False
         
         finally:
-            log.duration_seconds = time.time() - start_time
+            log.duration_seconds = time.monotonic() - start_time
             await self.notion_logger.log_ingestion(log)
-            print(f"Initial ingestion completed in {format_duration(log.duration_seconds)}")
+            logger.info("Initial ingestion completed in %s", format_duration(log.duration_seconds))
+    
+    @staticmethod
+    async def _run_pipeline(*stages):
+        """Run pipeline stages concurrently, cancelling the rest if one fails"""
+        tasks = [asyncio.create_task(stage) for stage in stages]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
     
     async def hourly_refresh(self):
         """Perform hourly refresh of new messages"""
-        start_time = time.time()
+        start_time = time.monotonic()
         log = IngestionLog(
             timestamp=get_current_utc_time(),
             operation="hourly_refresh",
@@ -185,7 +213,7 @@ class SlackIngestionWorker:
         )
         
         try:
-            print("Starting hourly refresh...")
+            logger.info("Starting hourly refresh...")
             
             # Get timestamp of last successful ingestion
             last_ingestion = await self.notion_logger.get_last_successful_ingestion()
@@ -193,14 +221,14 @@ class SlackIngestionWorker:
                 # Fallback to 1 hour ago if no previous ingestion found
                 last_ingestion = get_current_utc_time() - timedelta(hours=1)
             
-            print(f"Getting messages since {last_ingestion}")
+            logger.info("Getting messages since %s", last_ingestion)
             
             # Get new messages since last ingestion
             new_messages = await self.slack_ingester.get_all_messages_since(last_ingestion)
             log.messages_processed = len(new_messages)
             log.channels_processed = len(config.slack_channels)
             
-            print(f"Retrieved {len(new_messages)} new messages")
+            logger.info("Retrieved %d new messages", len(new_messages))
             
             if new_messages:
                 # Generate embeddings
@@ -210,32 +238,44 @@ class SlackIngestionWorker:
                 # Store in vector database
                 await self.pinecone_service.upsert_embeddings(embeddings_data)
                 
-                print(f"Processed {len(new_messages)} new messages")
+                logger.info("Processed %d new messages", len(new_messages))
             else:
-                print("No new messages to process")
+                logger.info("No new messages to process")
             
             log.success = True
             
         except Exception as e:
             error_msg = f"Hourly refresh failed: {str(e)}"
-            print(error_msg)
+            logger.error(error_msg)
             log.errors.append(error_msg)
             log.success = False
         
         finally:
-            log.duration_seconds = time.time() - start_time
+            log.duration_seconds = time.monotonic() - start_time
             await self.notion_logger.log_ingestion(log)
-            print(f"Hourly refresh completed in {format_duration(log.duration_seconds)}")
+            logger.info("Hourly refresh completed in %s", format_duration(log.duration_seconds))
+    
+    async def _run_refresh(self) -> bool:
+        """Run a refresh unless one is already in progress; returns whether one was run"""
+        if self.refresh_task and not self.refresh_task.done():
+            logger.info("Refresh already running, skipping")
+            return False
+        
+        self.refresh_task = asyncio.create_task(self.hourly_refresh())
+        await self.refresh_task
+        return True
     
-    async def manual_refresh(self):
-        """Manually trigger a refresh"""
-        print("Manual refresh triggered")
-        await self.hourly_refresh()
+    async def manual_refresh(self) -> bool:
+        """Manually trigger a refresh; returns False if one is already running"""
+        logger.info("Manual refresh triggered")
+        return await self._run_refresh()
     
     async def stop(self):
         """Stop the ingestion worker"""
-        print("Stopping ingestion worker...")
+        logger.info("Stopping ingestion worker...")
         self.running = False
+        if self._stop_event is not None:
+            self._stop_event.set()
         
         # Stop scheduler
         if self.scheduler.running:
@@ -243,17 +283,22 @@ class SlackIngestionWorker:
         
         # Cancel initial ingestion if still running
         if self.initial_ingestion_task and not self.initial_ingestion_task.done():
-            print("Cancelling initial ingestion...")
+            logger.info("Cancelling initial ingestion...")
             self.initial_ingestion_task.cancel()
             try:
                 await self.initial_ingestion_task
             except asyncio.CancelledError:
                 pass
         
+        await self.slack_ingester.close()
+        
+        # Write any ingestion logs still queued for Notion
+        await self.notion_logger.flush()
+        
         # Save final state
         self._save_state()
         
-        print("✅ Ingestion worker stopped gracefully")
+        logger.info("✅ Ingestion worker stopped gracefully")
 
 
 async def main():
@@ -263,10 +308,12 @@ async def main():
 
 
 if __name__ == "__main__":
+    # Standalone runs don't go through main_orchestrator's logging setup
+    setup_logging("INFO")
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\n👋 Goodbye!")
+        logger.info("👋 Goodbye!")
     except Exception as e:
-        print(f"❌ Fatal error: {e}")
+        logger.error("❌ Fatal error: %s", e)
         sys.exit(1) 
\ No newline at end of file
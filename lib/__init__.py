@@ -2,6 +2,7 @@
 
 from .config import config
 from .data_models import SlackMessage, SlackChannel, SlackUser, SlackReaction, IngestionLog
+from .embedding_cache import EmbeddingCache
 from .embedding_service import EmbeddingService
 from .pinecone_service import PineconeService
 from .notion_logger import NotionLogger
@@ -11,6 +12,9 @@ from .utils import (
     save_state, 
     get_current_utc_time, 
     format_duration,
+    setup_logging,
+    dump_json,
+    load_json,
     chunk_text,
     SlackTextCleaner,
     get_message_link,
@@ -22,11 +26,12 @@ from .utils import (
 __all__ = [
     'config',
     'SlackMessage', 'SlackChannel', 'SlackUser', 'SlackReaction', 'IngestionLog',
+    'EmbeddingCache',
     'EmbeddingService',
     'PineconeService', 
     'NotionLogger',
     'rate_limiter',
-    'load_state', 'save_state', 'get_current_utc_time', 'format_duration', 'chunk_text',
+    'load_state', 'save_state', 'get_current_utc_time', 'format_duration', 'setup_logging', 'dump_json', 'load_json', 'chunk_text',
     'SlackTextCleaner', 'get_message_link', 'get_slack_message_permalink',
     'replace_whitespaces_w_space', 'translate_vespa_highlight_to_slack'
 ] 
\ No newline at end of file
@@ -1,26 +1,44 @@
+import functools
 import os
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import Tuple
 
-@dataclass
+from lib.compat import DATACLASS_SLOTS
+
+def _env(name: str, default: str = ""):
+    """Field read from the environment when a Config is built, not when this module is imported"""
+    return field(default_factory=lambda: os.environ.get(name, default))
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class Config:
     # Slack Configuration
-    slack_bot_token: str = os.getenv("SLACK_BOT_TOKEN", "")
-    slack_channels: List[str] = None  # Will be populated from SLACK_CHANNELS env var
+    slack_bot_token: str = _env("SLACK_BOT_TOKEN")
+    slack_channels: Tuple[str, ...] = ()  # Will be populated from SLACK_CHANNELS env var
     
     # OpenAI Configuration
-    openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
+    openai_api_key: str = _env("OPENAI_API_KEY")
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536  # Standard dimension for text-embedding-3-small
+    embedding_batch_max: int = 32  # Max query texts coalesced into one embeddings call
+    embedding_batch_window_ms: int = 30  # How long to wait for more queries before sending a batch
+    query_embedding_cache_size: int = 10000  # Max cached search query embeddings
+    embedding_ingest_batch_size: int = 2048  # Max chunk texts per embeddings call during ingestion (API limit)
+    embedding_batch_max_tokens: int = 280000  # Token budget per embeddings call, under the API's per-request cap
+    embedding_max_concurrent_batches: int = 8  # Ingestion embedding calls in flight at once
+    embedding_cache_path: str = _env("EMBEDDING_CACHE_PATH", "embedding_cache.db")  # SQLite file of chunk embeddings reused across runs
+    embedding_cache_hours: int = 168  # How long a cached chunk embedding is reused
     
     # Pinecone Configuration
-    pinecone_api_key: str = os.getenv("PINECONE_API_KEY", "")
-    pinecone_environment: str = os.getenv("PINECONE_ENVIRONMENT", "")
-    pinecone_index_name: str = os.getenv("PINECONE_INDEX_NAME", "slack-messages")
+    pinecone_api_key: str = _env("PINECONE_API_KEY")
+    pinecone_environment: str = _env("PINECONE_ENVIRONMENT")
+    pinecone_index_name: str = _env("PINECONE_INDEX_NAME", "slack-messages")
+    pinecone_upsert_concurrency: int = 16  # Upsert batches sent to Pinecone at once
     
     # Notion Configuration
-    notion_integration_secret: str = os.getenv("NOTION_INTEGRATION_SECRET", "")
-    notion_database_id: str = os.getenv("NOTION_DATABASE_ID", "")
+    notion_integration_secret: str = _env("NOTION_INTEGRATION_SECRET")
+    notion_database_id: str = _env("NOTION_DATABASE_ID")
+    notion_log_batch_size: int = 25  # Queued ingestion logs that trigger an immediate write
+    notion_log_flush_seconds: int = 30  # Longest a queued ingestion log waits before being written
     
     # OpenAI Rate Limiting Configuration
     openai_rate_limit_per_minute: int = 3000  # Tier 1 rate limit
@@ -31,43 +49,98 @@ class Config:
     # Chunking Configuration
     max_chunk_size: int = 8000  # Characters per chunk for embeddings
     chunk_overlap: int = 200
+    max_chunk_tokens: int = 8000  # Tokens per chunk when tiktoken is installed (model limit is 8191)
+    chunk_overlap_tokens: int = 50
+    
+    # Search Configuration
+    search_batch_max_queries: int = 48  # Max queries per batch search request
+    search_result_cache_size: int = 5000  # Max cached search result sets
+    search_result_cache_ttl_seconds: int = 60  # How long identical searches reuse cached results
     
     # Caching Configuration
     cache_users_hours: int = 24  # How long to cache user info
     cache_channels_hours: int = 24  # How long to cache channel info
+    cache_users_max: int = 50000  # Cached users kept before the soonest-expiring is evicted
+    cache_channels_max: int = 1000  # Cached channels kept before the soonest-expiring is evicted
+    slack_cache_path: str = _env("SLACK_CACHE_PATH", "slack_cache.db")  # SQLite file keeping the user/channel caches across restarts
+    
+    # Ingestion Concurrency Configuration
+    user_fetch_concurrency: int = 8  # Max concurrent users.info lookups when prefetching
+    channel_concurrency: int = 4  # Max channels ingested at the same time
+    thread_concurrency: int = 8  # Max concurrent conversations.replies calls per channel
+    ingest_pipeline_batch_size: int = 1000  # Messages embedded and upserted per step of the initial ingestion pipeline
+    ingest_pipeline_queue_size: int = 4  # Batches buffered between pipeline stages
     
     # MCP Configuration
     mcp_server_name: str = "slack-chatter-search"
     mcp_server_version: str = "2.0.0"
     
+    # Set once _validate_config passes so later callers skip the checks
+    _fully_validated: bool = field(default=False, init=False, repr=False, compare=False)
+    
     def __post_init__(self):
         # Parse comma-separated channels from environment
-        channels_str = os.getenv("SLACK_CHANNELS", "")
-        if channels_str:
-            self.slack_channels = [ch.strip() for ch in channels_str.split(",")]
-        else:
-            self.slack_channels = []
+        channels_str = os.environ.get("SLACK_CHANNELS", "")
+        # Frozen dataclass: assign through object.__setattr__. Blank entries are
+        # dropped and duplicates removed while keeping the configured order
+        channels = filter(None, (ch.strip() for ch in channels_str.split(",")))
+        object.__setattr__(self, "slack_channels", tuple(dict.fromkeys(channels)))
         
-        # Validate required configurations
-        self._validate_config()
+        # Only settings every mode needs are checked here; Slack, Pinecone and
+        # Notion settings are checked by the services that use them
+        self._validate_core()
     
     def _validate_config(self):
-        required_vars = [
-            ("SLACK_BOT_TOKEN", self.slack_bot_token),
-            ("OPENAI_API_KEY", self.openai_api_key),
+        """Validate every setting (ingestion needs all of them); a passing check is remembered"""
+        if self._fully_validated:
+            return
+        self._require(self._core_vars() + self._slack_vars() + self._pinecone_vars() + self._notion_vars())
+        self._require_channels()
+        object.__setattr__(self, "_fully_validated", True)
+    
+    def _validate_core(self):
+        self._require(self._core_vars())
+    
+    def validate_slack(self):
+        self._require(self._slack_vars())
+        self._require_channels()
+    
+    def validate_notion(self):
+        self._require(self._notion_vars())
+    
+    def _core_vars(self):
+        return [("OPENAI_API_KEY", self.openai_api_key)]
+    
+    def _slack_vars(self):
+        return [("SLACK_BOT_TOKEN", self.slack_bot_token)]
+    
+    def _pinecone_vars(self):
+        return [
             ("PINECONE_API_KEY", self.pinecone_api_key),
             ("PINECONE_ENVIRONMENT", self.pinecone_environment),
+        ]
+    
+    def _notion_vars(self):
+        return [
             ("NOTION_INTEGRATION_SECRET", self.notion_integration_secret),
             ("NOTION_DATABASE_ID", self.notion_database_id),
         ]
-        
+    
+    def _require_channels(self):
+        if not self.slack_channels:
+            raise ValueError("No Slack channels specified. Set SLACK_CHANNELS environment variable.")
+    
+    @staticmethod
+    def _require(required_vars):
         missing_vars = [var_name for var_name, var_value in required_vars if not var_value]
         
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
-        
-        if not self.slack_channels:
-            raise ValueError("No Slack channels specified. Set SLACK_CHANNELS environment variable.")
+
+@functools.lru_cache(maxsize=1)
+def get_config() -> Config:
+    """Get the process-wide Config, building (and validating) it only once"""
+    return Config()
 
 # Create global config instance
-config = Config()
+config = get_config()
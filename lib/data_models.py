@@ -1,8 +1,47 @@
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from types import MappingProxyType
+from typing import List, NamedTuple, Optional, Dict, Any, Tuple
 
-@dataclass
+from lib.compat import DATACLASS_SLOTS
+
+# Fixed pieces of the embedding text, built once rather than per message
+_CONTENT_TYPE_TAGS = {
+    "canvas": "\nCanvas",
+    "list": "\nList",
+    "workflow": "\nWorkflow",
+    "post": "\nPost",
+    "file": "\nFile",
+}
+_THREAD_REPLY_TAG = "\nThread Reply"
+_THREAD_PARENT_TAG = "\nThread Parent"
+_NO_FILE_INFO = MappingProxyType({})
+_CONTENT_LABELS = {
+    "canvas": "Canvas Content",
+    "list": "List Content",
+    "workflow": "Workflow Content",
+    "post": "Post Content",
+    "file": "File Content",
+    "message": "Message"
+}
+
+# Reaction users named in context metadata before the rest are summarized as a count
+_REACTION_USERS_SHOWN = 3
+
+def _format_reactions(reactions: List['SlackReaction']) -> str:
+    """Format reactions as ':name: (count) by user, ...' naming at most a few users each"""
+    formatted = []
+    for r in reactions:
+        if r.user_names:
+            users_text = ", ".join(r.user_names[:_REACTION_USERS_SHOWN])
+            if len(r.user_names) > _REACTION_USERS_SHOWN:
+                users_text += f" and {len(r.user_names) - _REACTION_USERS_SHOWN} others"
+            formatted.append(f":{r.name}: ({r.count}) by {users_text}")
+        else:
+            formatted.append(f":{r.name}: ({r.count})")
+    return ", ".join(formatted)
+
+@dataclass(**DATACLASS_SLOTS)
 class SlackUser:
     id: str
     name: str
@@ -10,14 +49,13 @@ class SlackUser:
     real_name: str
     email: Optional[str] = None
 
-@dataclass
-class SlackReaction:
+class SlackReaction(NamedTuple):
     name: str
     count: int
-    users: List[str]  # User IDs who reacted
-    user_names: List[str] = field(default_factory=list)  # Resolved usernames
+    users: Tuple[str, ...]  # User IDs who reacted
+    user_names: Tuple[str, ...] = ()  # Resolved usernames
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class SlackMessage:
     id: str  # message timestamp serves as ID
     text: str
@@ -37,103 +75,70 @@ class SlackMessage:
     file_info: Optional[Dict[str, Any]] = None  # File metadata if applicable
     
     def to_text_for_embedding(self) -> str:
-        """Convert message to text suitable for embedding generation"""
-        text_parts = []
-        
-        # Add channel context
-        text_parts.append(f"Channel: {self.channel_name}")
-        
-        # Add user context
-        text_parts.append(f"User: {self.user_name}")
-        
-        # Add timestamp context
-        text_parts.append(f"Time: {self.timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+        """Convert message to text suitable for embedding generation
         
+        Only content that doesn't change after posting is embedded; channel, user,
+        time and reactions live in metadata so edits to them don't force a re-embed
+        """
         # Add content type context
-        if self.content_type == "canvas":
-            text_parts.append("Canvas")
-            if self.canvas_title:
-                text_parts.append(f"Canvas Title: {self.canvas_title}")
-        elif self.content_type == "list":
-            text_parts.append("List")
-        elif self.content_type == "workflow":
-            text_parts.append("Workflow")
-        elif self.content_type == "post":
-            text_parts.append("Post")
-        elif self.content_type == "file":
-            text_parts.append("File")
-            if self.file_info:
-                text_parts.append(f"File Type: {self.file_info.get('filetype', 'unknown')}")
+        content_type = self.content_type
+        type_tag = _CONTENT_TYPE_TAGS.get(content_type)
+        text = ""
+        if type_tag is not None:
+            text += type_tag
+            if content_type == "canvas" and self.canvas_title:
+                text += f"\nCanvas Title: {self.canvas_title}"
+            elif content_type == "file" and self.file_info:
+                text += f"\nFile Type: {self.file_info.get('filetype', 'unknown')}"
         elif self.thread_ts and not self.is_thread_parent:
-            text_parts.append("Thread Reply")
+            text += _THREAD_REPLY_TAG
         elif self.is_thread_parent and self.reply_count > 0:
-            text_parts.append(f"Thread Parent ({self.reply_count} replies)")
+            text += _THREAD_PARENT_TAG
         
         # Add main message text
-        content_labels = {
-            "canvas": "Canvas Content",
-            "list": "List Content", 
-            "workflow": "Workflow Content",
-            "post": "Post Content",
-            "file": "File Content",
-            "message": "Message"
-        }
-        content_label = content_labels.get(self.content_type, "Message")
-        text_parts.append(f"{content_label}: {self.text}")
-        
-        # Add reactions if any
-        if self.reactions:
-            reactions_list = []
-            for r in self.reactions:
-                if r.user_names:
-                    users_text = ", ".join(r.user_names[:3])  # Show first 3 users
-                    if len(r.user_names) > 3:
-                        users_text += f" and {len(r.user_names) - 3} others"
-                    reactions_list.append(f":{r.name}: ({r.count}) by {users_text}")
-                else:
-                    reactions_list.append(f":{r.name}: ({r.count})")
-            text_parts.append(f"Reactions: {', '.join(reactions_list)}")
+        text += f"\n{_CONTENT_LABELS.get(content_type, 'Message')}: {self.text}"
         
         # Add thread replies if this is a thread parent
         if self.thread_replies:
-            text_parts.append(f"\nThread Replies ({len(self.thread_replies)}):")
-            for i, reply in enumerate(self.thread_replies, 1):
-                text_parts.append(f"Reply {i} by {reply.user_name} at {reply.timestamp.strftime('%H:%M')}: {reply.text}")
-                if reply.reactions:
-                    reply_reactions_list = []
-                    for r in reply.reactions:
-                        if r.user_names:
-                            users_text = ", ".join(r.user_names[:2])  # Show first 2 users for replies
-                            if len(r.user_names) > 2:
-                                users_text += f" +{len(r.user_names) - 2}"
-                            reply_reactions_list.append(f":{r.name}: ({r.count}) by {users_text}")
-                        else:
-                            reply_reactions_list.append(f":{r.name}: ({r.count})")
-                    text_parts.append(f"    Reactions: {', '.join(reply_reactions_list)}")
+            text += "\n\nThread Replies:" + "".join(
+                f"\nReply {i}: {reply.text}" for i, reply in enumerate(self.thread_replies, 1)
+            )
         
-        return "\n".join(text_parts)
+        # Every piece starts with a newline; drop the leading one
+        return text[1:]
+    
+    def to_context_metadata(self) -> Dict[str, Any]:
+        """Convert fields that change after posting (reactions, thread participants) to Pinecone metadata"""
+        metadata = {}
+        if self.reactions:
+            metadata["reactions"] = _format_reactions(self.reactions)
+        if self.thread_replies:
+            metadata["thread_reply_users"] = list(dict.fromkeys(reply.user_name for reply in self.thread_replies))
+        return metadata
     
     def to_metadata(self) -> Dict[str, Any]:
         """Convert message to metadata for Pinecone storage"""
+        timestamp = self.timestamp
         return {
             "message_id": self.id,
             "user_id": self.user_id,
             "user_name": self.user_name,
             "channel_id": self.channel_id,
             "channel_name": self.channel_name,
-            "timestamp": self.timestamp.isoformat(),
-            "thread_ts": self.thread_ts if self.thread_ts else "",
+            "timestamp": timestamp.isoformat(),
+            "timestamp_unix": int(timestamp.timestamp()),  # Numeric copy for range filters
+            "thread_ts": self.thread_ts or "",
             "is_thread_parent": self.is_thread_parent,
             "reply_count": self.reply_count,
             "reaction_count": len(self.reactions),
             "text_length": len(self.text),
             "is_canvas": self.is_canvas,
-            "canvas_title": self.canvas_title if self.canvas_title else "",
+            "canvas_title": self.canvas_title or "",
             "content_type": self.content_type,
-            "file_type": self.file_info.get('filetype', '') if self.file_info else ""
+            "file_type": (self.file_info or _NO_FILE_INFO).get('filetype', '')
         }
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class SlackChannel:
     id: str
     name: str
@@ -142,7 +147,7 @@ class SlackChannel:
     is_private: bool
     created: datetime
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class IngestionLog:
     timestamp: datetime
     operation: str  # "initial_ingestion" or "hourly_refresh"
@@ -0,0 +1,91 @@
+"""
+Persistent embedding cache
+Stores chunk embeddings in SQLite keyed by a hash of model, dimensions and chunk text
+"""
+
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import struct
+import time
+from contextlib import closing
+from typing import Dict, List, Tuple
+
+from lib.config import config
+
+logger = logging.getLogger(__name__)
+
+_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    vector BLOB NOT NULL,
+    expiry REAL NOT NULL
+)
+"""
+
+# Stay below SQLite's default limit on bound parameters per statement
+_LOOKUP_CHUNK_SIZE = 500
+
+class EmbeddingCache:
+    def __init__(self, path: str = None):
+        self.path = path or config.embedding_cache_path
+        self.ttl_seconds = config.embedding_cache_hours * 3600
+        # Vectors are stored as packed float32 so cached hits match fresh embeddings exactly
+        self._codec = struct.Struct(f"<{config.embedding_dimensions}f")
+        self._prefix = f"{config.embedding_model}:{config.embedding_dimensions}:"
+    
+    def key_for(self, text: str) -> str:
+        """Cache key for a chunk of text under the configured model and dimensions"""
+        return hashlib.sha256((self._prefix + text).encode("utf-8")).hexdigest()
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Look up cached embeddings, returning only the keys that were found and unexpired"""
+        if not keys:
+            return {}
+        return await asyncio.to_thread(self._read, keys)
+    
+    async def put_many(self, items: List[Tuple[str, List[float]]]):
+        """Store embeddings for the given keys in one transaction"""
+        if not items:
+            return
+        expiry = time.time() + self.ttl_seconds
+        rows = [
+            (key, self._codec.pack(*embedding), expiry)
+            for key, embedding in items
+            if len(embedding) == config.embedding_dimensions
+        ]
+        await asyncio.to_thread(self._write, rows)
+    
+    def _read(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Read unexpired vectors for keys, querying in chunks"""
+        found = {}
+        now = time.time()
+        try:
+            with closing(sqlite3.connect(self.path)) as db:
+                db.execute(_CACHE_SCHEMA)
+                for start in range(0, len(keys), _LOOKUP_CHUNK_SIZE):
+                    chunk = keys[start:start + _LOOKUP_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders}) AND expiry > ?",
+                        (*chunk, now)
+                    )
+                    for key, blob in rows:
+                        if len(blob) == self._codec.size:
+                            found[key] = list(self._codec.unpack(blob))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read embedding cache from {self.path}: {e}")
+        return found
+    
+    def _write(self, rows: List[Tuple[str, bytes, float]]):
+        """Upsert rows and drop expired entries in one transaction"""
+        try:
+            with closing(sqlite3.connect(self.path)) as db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(_CACHE_SCHEMA)
+                with db:
+                    db.execute("DELETE FROM embeddings WHERE expiry <= ?", (time.time(),))
+                    db.executemany("INSERT OR REPLACE INTO embeddings (key, vector, expiry) VALUES (?, ?, ?)", rows)
+        except sqlite3.Error as e:
+            logger.warning(f"Could not save embeddings to {self.path}: {e}")
@@ -1,45 +1,202 @@
 import asyncio
-from typing import List, Tuple
-from openai import OpenAI
+import hashlib
+import logging
+import struct
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+import httpx
+from openai import AsyncOpenAI
 
 from lib.config import config
 from lib.data_models import SlackMessage
+from lib.embedding_cache import EmbeddingCache
 from lib.rate_limiter import rate_limiter
 from lib.utils import chunk_text
 
+try:
+    # Exact token counts for packing batches; without it tokens are estimated from length
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Shared OpenAI client, so every service multiplexes its calls over one
+# connection pool instead of opening its own
+_openai_client: Optional[AsyncOpenAI] = None
+
+def get_openai_client() -> AsyncOpenAI:
+    """Get the shared OpenAI client, creating it on first use"""
+    global _openai_client
+    if _openai_client is None:
+        try:
+            import h2  # noqa: F401 - HTTP/2 support is optional
+            http2 = True
+        except ImportError:
+            http2 = False
+        
+        _openai_client = AsyncOpenAI(
+            api_key=config.openai_api_key,
+            http_client=httpx.AsyncClient(
+                http2=http2,
+                timeout=httpx.Timeout(60.0),
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+            )
+        )
+    return _openai_client
+
+async def close_openai_client():
+    """Close the shared OpenAI client"""
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
+
 class EmbeddingService:
     def __init__(self):
-        self.client = OpenAI(api_key=config.openai_api_key)
+        self.client = get_openai_client()
+        
+        # Micro-batching queue for concurrent query embeddings (started lazily)
+        self._coalesce_queue: Optional[asyncio.Queue] = None
+        self._coalesce_task: Optional[asyncio.Task] = None
+        self._batch_metrics = {
+            "batches": 0,
+            "texts": 0,
+            "max_batch_size": 0,
+            "last_batch_size": 0,
+            "last_batch_latency_ms": 0.0,
+            "total_latency_ms": 0.0
+        }
+        
+        # LRU cache of query embeddings keyed by hash of (model, normalized query),
+        # stored as packed float16 (2 bytes per dimension)
+        self._query_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._fp16_codec = struct.Struct(f"<{config.embedding_dimensions}e")
+        self._query_cache_hits = 0
+        self._query_cache_misses = 0
+        
+        # Persistent cache of chunk embeddings so unchanged text isn't re-embedded on refresh
+        self.embedding_cache = EmbeddingCache()
+        
+        # Token encoder used to pack ingestion batches (text-embedding-3 models use cl100k_base)
+        self._encoding = tiktoken.get_encoding("cl100k_base") if tiktoken is not None else None
     
     async def generate_embeddings(self, messages: List[SlackMessage]) -> List[Tuple[str, List[float], dict]]:
         """Generate embeddings for messages, returning (id, embedding, metadata) tuples"""
-        embeddings_data = []
-        
+        # Flatten every message into its chunks: (chunk_id, base metadata, chunk index, total chunks, text)
+        all_chunks = []
         for message in messages:
             # Convert message to text for embedding
             text = message.to_text_for_embedding()
             
             # Chunk the text if it's too long
-            chunks = chunk_text(text, config.max_chunk_size, config.chunk_overlap)
+            chunks = self._chunk_text(text)
+            total_chunks = len(chunks)
+            
+            # Message metadata is the same for every chunk, so build it once; fields that
+            # change after posting are kept here rather than in the embedded text
+            base_metadata = {**message.to_metadata(), **message.to_context_metadata()}
             
             for i, chunk in enumerate(chunks):
-                chunk_id = f"{message.id}"
-                if len(chunks) > 1:
-                    chunk_id += f"_chunk_{i}"
-                
-                # Generate embedding
-                embedding = await self._generate_single_embedding(chunk)
-                if embedding:
-                    # Create metadata
-                    metadata = message.to_metadata()
-                    metadata['chunk_index'] = i
-                    metadata['total_chunks'] = len(chunks)
-                    metadata['text'] = chunk
-                    
-                    embeddings_data.append((chunk_id, embedding, metadata))
+                chunk_id = f"{message.id}_chunk_{i}" if total_chunks > 1 else message.id
+                all_chunks.append((chunk_id, base_metadata, i, total_chunks, chunk))
+        
+        # Reuse cached vectors for chunk text embedded before; only misses go to the API
+        cache = self.embedding_cache
+        keys = [cache.key_for(entry[4]) for entry in all_chunks]
+        cached = await cache.get_many(list(set(keys)))
+        vectors: List[Optional[List[float]]] = [cached.get(key) for key in keys]
+        misses = [idx for idx, vector in enumerate(vectors) if vector is None]
+        
+        # Identical chunk text ("+1", bot heartbeats, emoji-only replies) is embedded
+        # once per pass; duplicates take the vector of the first occurrence
+        duplicates: Dict[str, List[int]] = {}
+        for idx in misses:
+            duplicates.setdefault(keys[idx], []).append(idx)
+        misses = [positions[0] for positions in duplicates.values()]
+        
+        # Batch chunks of similar length together (longest first) so each request
+        # has a predictable token count; batches hold positions into all_chunks
+        order = sorted(misses, key=lambda idx: len(all_chunks[idx][4]), reverse=True)
+        batches = self._pack_batches(order, {idx: self._count_tokens(all_chunks[idx][4]) for idx in misses})
+        semaphore = asyncio.Semaphore(config.embedding_max_concurrent_batches)
+        
+        async def embed_batch(batch):
+            # The rate limiter wait happens inside the semaphore, so it still paces every request
+            async with semaphore:
+                return await self._generate_batch_embedding([all_chunks[idx][4] for idx in batch])
+        
+        results = await asyncio.gather(*(embed_batch(batch) for batch in batches))
+        
+        # Scatter vectors back to their chunk positions; a failed batch leaves None
+        fresh = []
+        for batch, embeddings in zip(batches, results):
+            if embeddings:
+                for idx, embedding in zip(batch, embeddings):
+                    key = keys[idx]
+                    for position in duplicates[key]:
+                        vectors[position] = embedding
+                    fresh.append((key, embedding))
+        await cache.put_many(fresh)
+        if all_chunks:
+            logger.debug("Embedding cache: %d hits or duplicates, %d embedded", len(all_chunks) - len(misses), len(misses))
+        
+        embeddings_data = []
+        for (chunk_id, base_metadata, i, total_chunks, chunk), embedding in zip(all_chunks, vectors):
+            if embedding is not None:
+                metadata = {**base_metadata, 'chunk_index': i, 'total_chunks': total_chunks, 'text': chunk}
+                embeddings_data.append((chunk_id, embedding, metadata))
         
         return embeddings_data
     
+    def _chunk_text(self, text: str) -> List[str]:
+        """Split text into chunks under the model's token limit, by tokens when tiktoken is installed"""
+        encoding = self._encoding
+        if encoding is None:
+            return chunk_text(text, config.max_chunk_size, config.chunk_overlap)
+        
+        # Every token covers at least one UTF-8 byte, so short texts need no encoding
+        max_tokens = config.max_chunk_tokens
+        if len(text) <= max_tokens // 4 or len(text.encode("utf-8")) <= max_tokens:
+            return [text]
+        
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return [text]
+        
+        # Overlapping windows of token IDs, decoded back to text
+        overlap = config.chunk_overlap_tokens
+        return [
+            encoding.decode(tokens[start:start + max_tokens])
+            for start in range(0, len(tokens) - overlap, max_tokens - overlap)
+        ]
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count tokens in text, or estimate them when tiktoken isn't installed"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        # Conservative estimate: English averages about 4 characters per token
+        return len(text) // 3 + 1
+    
+    @staticmethod
+    def _pack_batches(order: List[int], token_counts: Dict[int, int]) -> List[List[int]]:
+        """Greedily pack chunk positions into batches within the per-request input and token limits"""
+        max_inputs = config.embedding_ingest_batch_size
+        max_tokens = config.embedding_batch_max_tokens
+        batches = []
+        batch, batch_tokens = [], 0
+        for idx in order:
+            tokens = token_counts[idx]
+            if batch and (len(batch) >= max_inputs or batch_tokens + tokens > max_tokens):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(idx)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+    
     async def _generate_single_embedding(self, text: str) -> List[float]:
         """Generate a single embedding for text"""
         try:
@@ -47,7 +204,7 @@ class EmbeddingService:
             
             # Note: the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
             # For embeddings, we use text-embedding-3-small which is efficient and effective
-            response = self.client.embeddings.create(
+            response = await self.client.embeddings.create(
                 model=config.embedding_model,
                 input=text,
                 dimensions=config.embedding_dimensions
@@ -56,5 +213,124 @@ class EmbeddingService:
             return response.data[0].embedding
             
         except Exception as e:
-            print(f"Error generating embedding: {e}")
+            logger.error("Error generating embedding: %s", e, exc_info=True)
+            return None
+    
+    async def _generate_batch_embedding(self, texts: List[str]) -> Optional[List[List[float]]]:
+        """Generate embeddings for several texts in a single API call, aligned with input order"""
+        try:
+            await rate_limiter.wait_if_needed("openai", config.openai_rate_limit_per_minute)
+            
+            response = await self.client.embeddings.create(
+                model=config.embedding_model,
+                input=texts,
+                dimensions=config.embedding_dimensions
+            )
+            
+            # The API reports each embedding's position in the input list
+            return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        
+        except Exception as e:
+            logger.error("Error generating batch embedding: %s", e, exc_info=True)
             return None
+    
+    async def embed_query(self, query: str) -> Optional[List[float]]:
+        """Generate an embedding for a search query, reusing cached vectors for repeated queries"""
+        query = query.strip()
+        # Padding variants share a cache entry; case is kept since it can change the embedding
+        key = hashlib.sha1(f"{config.embedding_model}:{query}".encode("utf-8")).hexdigest()
+        
+        cached = self._query_cache.get(key)
+        if cached is not None:
+            self._query_cache.move_to_end(key)
+            self._query_cache_hits += 1
+            return list(self._fp16_codec.unpack(cached))
+        
+        self._query_cache_misses += 1
+        embedding = await self.embed_coalesced(query)
+        if embedding and len(embedding) == config.embedding_dimensions:
+            # Half precision costs nothing measurable in cosine similarity
+            self._query_cache[key] = self._fp16_codec.pack(*embedding)
+            if len(self._query_cache) > config.query_embedding_cache_size:
+                self._query_cache.popitem(last=False)
+        return embedding
+    
+    def get_query_cache_metrics(self) -> dict:
+        """Get query embedding cache hit/miss counts"""
+        return {
+            "size": len(self._query_cache),
+            "cache_hits": self._query_cache_hits,
+            "cache_misses": self._query_cache_misses
+        }
+    
+    async def embed_coalesced(self, text: str) -> Optional[List[float]]:
+        """Generate an embedding for text, sharing one API call with other concurrent callers"""
+        if self._coalesce_task is None or self._coalesce_task.done():
+            if self._coalesce_queue is None:
+                self._coalesce_queue = asyncio.Queue()
+            self._coalesce_task = asyncio.create_task(self._run_coalescer())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._coalesce_queue.put((text, future))
+        return await future
+    
+    async def _run_coalescer(self):
+        """Drain queued texts into batches of up to embedding_batch_max within embedding_batch_window_ms"""
+        loop = asyncio.get_running_loop()
+        queue = self._coalesce_queue
+        window = config.embedding_batch_window_ms / 1000
+        
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + window
+            
+            while len(batch) < config.embedding_batch_max:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            started = time.perf_counter()
+            try:
+                embeddings = await self._generate_batch_embedding([text for text, _ in batch])
+            except Exception as e:
+                logger.error("Error in embedding batch: %s", e, exc_info=True)
+                embeddings = None
+            self._record_batch(len(batch), time.perf_counter() - started)
+            
+            for i, (_, future) in enumerate(batch):
+                # Skip waiters that were cancelled while the batch was in flight
+                if not future.done():
+                    future.set_result(embeddings[i] if embeddings else None)
+    
+    def _record_batch(self, size: int, elapsed: float):
+        """Record size and latency of a coalesced embedding batch"""
+        metrics = self._batch_metrics
+        latency_ms = elapsed * 1000
+        metrics["batches"] += 1
+        metrics["texts"] += size
+        metrics["max_batch_size"] = max(metrics["max_batch_size"], size)
+        metrics["last_batch_size"] = size
+        metrics["last_batch_latency_ms"] = round(latency_ms, 2)
+        metrics["total_latency_ms"] += latency_ms
+    
+    def get_batch_metrics(self) -> dict:
+        """Get micro-batching metrics (batch sizes and OpenAI latency)"""
+        metrics = self._batch_metrics
+        batches = metrics["batches"]
+        return {
+            "batches": batches,
+            "texts": metrics["texts"],
+            "avg_batch_size": round(metrics["texts"] / batches, 2) if batches else 0.0,
+            "max_batch_size": metrics["max_batch_size"],
+            "last_batch_size": metrics["last_batch_size"],
+            "last_batch_latency_ms": metrics["last_batch_latency_ms"],
+            "avg_batch_latency_ms": round(metrics["total_latency_ms"] / batches, 2) if batches else 0.0
+        }
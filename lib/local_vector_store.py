@@ -0,0 +1,403 @@
+"""
+Local vector storage
+Raw float32 vector rows plus an append-only JSONL log of ids and metadata, used when Pinecone isn't configured
+"""
+
+import heapq
+import logging
+import math
+import mmap
+import os
+from array import array
+from datetime import datetime
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from lib.config import config
+from lib.utils import dump_json, load_json
+
+try:
+    # numpy scores every stored vector in one matrix product; without it scoring is a Python loop
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Rewrite the files once superseded and deleted lines reach this share of live vectors
+_COMPACT_GARBAGE_RATIO = 0.3
+
+# Rows quantized or scored per numpy block, bounding temporary float32 copies
+_BLOCK_ROWS = 1024
+
+# Candidates per requested result rescored exactly after int8 scoring
+_RESCORE_FACTOR = 4
+
+# Metadata never used in filters, left out of the inverted index (the chunk text)
+_UNINDEXED_KEYS = frozenset({"text"})
+
+# Pinecone range operators, which only ever match numbers
+_RANGE_OPS = {
+    "$gt": lambda a, b: a > b,
+    "$gte": lambda a, b: a >= b,
+    "$lt": lambda a, b: a < b,
+    "$lte": lambda a, b: a <= b,
+}
+
+def _index_terms(metadata: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """(key, value) pairs a vector is filed under; list values are filed under each element"""
+    terms = []
+    for key, value in metadata.items():
+        if key in _UNINDEXED_KEYS:
+            continue
+        for item in (value if isinstance(value, list) else (value,)):
+            if isinstance(item, (str, int, float, bool)):
+                terms.append((key, item))
+    return terms
+
+def _compare(op: str, actual: Any, operand: Any) -> bool:
+    """Evaluate one Pinecone comparison operator against a metadata value"""
+    if op == "$exists":
+        return (actual is not None) == bool(operand)
+    if actual is None:
+        return op in ("$ne", "$nin")
+    # List fields match when any element satisfies the operator (and, for $ne/$nin, none violate it)
+    values = actual if isinstance(actual, list) else (actual,)
+    if op == "$eq":
+        return operand in values
+    if op == "$ne":
+        return operand not in values
+    if op == "$in":
+        return any(value in operand for value in values)
+    if op == "$nin":
+        return not any(value in operand for value in values)
+    if op in _RANGE_OPS:
+        return any(
+            isinstance(value, (int, float)) and not isinstance(value, bool) and _RANGE_OPS[op](value, operand)
+            for value in values
+        )
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+def _matches(metadata: Dict[str, Any], filter_dict: Dict[str, Any]) -> bool:
+    """Whether metadata satisfies a Pinecone-style filter"""
+    for key, condition in filter_dict.items():
+        if key == "$and":
+            if not all(_matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(_matches(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            if not all(_compare(op, metadata.get(key), operand) for op, operand in condition.items()):
+                return False
+        elif not _compare("$eq", metadata.get(key), condition):
+            return False
+    return True
+
+class LocalVectorStore:
+    """Vectors stored as fixed-size float32 rows; ids and metadata as JSON lines pointing at their row"""
+    
+    def __init__(self, path: str = "pinecone_vectors.jsonl", vectors_path: str = "pinecone_vectors.f32",
+                 legacy_path: Optional[str] = "pinecone_vectors.json"):
+        self.path = path
+        self.vectors_path = vectors_path
+        self.dimension = config.embedding_dimensions
+        self.row_size = self.dimension * array('f').itemsize
+        self.last_update: Optional[str] = None
+        # Byte offset of each vector's latest metadata line and its row in the vectors file;
+        # reads slice both out of memory maps
+        self._index: Dict[str, Tuple[int, int]] = {}
+        self._garbage = 0  # Metadata lines no longer reachable from _index
+        # Inverted index of metadata (key, value) -> ids, and the terms each id is filed under
+        self._by_meta: Dict[Tuple[str, Any], Set[str]] = defaultdict(set)
+        self._terms: Dict[str, List[Tuple[str, Any]]] = {}
+        # int8 copy of the live vectors at unit length for numpy scoring, one scale per
+        # row, rebuilt after writes; the float32 file stays the source of truth
+        self._matrix = None
+        self._scales = None
+        self._matrix_ids: List[str] = []
+        self._matrix_rows = None
+        
+        storage_dir = os.path.dirname(path)
+        if storage_dir:
+            os.makedirs(storage_dir, exist_ok=True)
+        
+        self._file = open(path, 'a+b')
+        self._vectors_file = open(vectors_path, 'a+b')
+        self._load()
+        
+        if not self._index and legacy_path and os.path.exists(legacy_path):
+            self._import_legacy(legacy_path)
+    
+    def __len__(self) -> int:
+        return len(self._index)
+    
+    @property
+    def row_count(self) -> int:
+        """Rows written to the vectors file, live or not"""
+        return self._vectors_file.seek(0, os.SEEK_END) // self.row_size
+    
+    def _load(self):
+        """Rebuild the index by scanning the metadata log once"""
+        self._file.seek(0)
+        offset = 0
+        for line in self._file:
+            if line.strip():
+                record = load_json(line)
+                vector_id = record['id']
+                if vector_id in self._index:
+                    self._garbage += 1
+                if record.get('deleted'):
+                    self._index.pop(vector_id, None)
+                    self._unindex(vector_id)
+                    self._garbage += 1
+                else:
+                    self._index[vector_id] = (offset, record['row'])
+                    self._reindex(vector_id, record.get('metadata', {}))
+            offset += len(line)
+        
+        if offset:
+            self.last_update = datetime.utcfromtimestamp(os.path.getmtime(self.path)).isoformat()
+    
+    def _import_legacy(self, legacy_path: str):
+        """Copy vectors from the old single-document JSON storage file"""
+        try:
+            with open(legacy_path, 'rb') as f:
+                data = load_json(f.read())
+        except ValueError as e:
+            logger.warning(f"Could not import legacy vectors from {legacy_path}: {e}")
+            return
+        
+        vectors = data.get('vectors', [])
+        self.upsert([(v['id'], v['values'], v.get('metadata', {})) for v in vectors])
+        logger.info(f"Imported {len(vectors)} vectors from {legacy_path}")
+    
+    def _append(self, records: List[Dict[str, Any]]) -> List[int]:
+        """Append records as metadata lines, returning the offset of each"""
+        lines = [dump_json(record) + b"\n" for record in records]
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(b"".join(lines))
+        self._file.flush()
+        
+        offsets = []
+        for line in lines:
+            offsets.append(offset)
+            offset += len(line)
+        self.last_update = datetime.utcnow().isoformat()
+        return offsets
+    
+    def _append_rows(self, vectors: List[List[float]]) -> int:
+        """Append vectors as float32 rows, returning the row number of the first"""
+        rows = array('f')
+        for vector in vectors:
+            if len(vector) != self.dimension:
+                raise ValueError(f"Vector has {len(vector)} dimensions, expected {self.dimension}")
+            rows.extend(vector)
+        first_row = self.row_count
+        self._vectors_file.write(rows.tobytes())
+        self._vectors_file.flush()
+        return first_row
+    
+    def upsert(self, embeddings_data: List[tuple]):
+        """Append (id, values, metadata) tuples; later lines supersede earlier ones for the same id"""
+        if not embeddings_data:
+            return
+        
+        # Rows go in before the metadata that points at them
+        first_row = self._append_rows([embedding_vector for _, embedding_vector, _ in embeddings_data])
+        records = [
+            {'id': embedding_id, 'row': first_row + i, 'metadata': metadata}
+            for i, (embedding_id, _, metadata) in enumerate(embeddings_data)
+        ]
+        for record, offset in zip(records, self._append(records)):
+            if record['id'] in self._index:
+                self._garbage += 1
+            self._index[record['id']] = (offset, record['row'])
+            self._reindex(record['id'], record['metadata'])
+        self._matrix = None
+        self._maybe_compact()
+    
+    def delete(self, ids: Iterable[str]) -> int:
+        """Append tombstones for the given ids, returning how many were present"""
+        present = [vector_id for vector_id in ids if vector_id in self._index]
+        if not present:
+            return 0
+        self._append([{'id': vector_id, 'deleted': True} for vector_id in present])
+        for vector_id in present:
+            del self._index[vector_id]
+            self._unindex(vector_id)
+        self._matrix = None
+        # The superseded metadata line and the tombstone itself are both garbage
+        self._garbage += 2 * len(present)
+        self._maybe_compact()
+        return len(present)
+    
+    def ids_matching(self, filter_dict: Dict[str, Any]) -> Set[str]:
+        """Ids whose metadata satisfies a Pinecone-style filter
+
+        Plain equality terms are answered from the inverted index; operator terms
+        ($gte, $in, $or, ...) are then checked against the metadata of those ids.
+        """
+        postings = []
+        predicates = {}
+        for key, value in filter_dict.items():
+            if isinstance(value, dict) and set(value) == {"$eq"}:
+                value = value["$eq"]
+            if not key.startswith("$") and isinstance(value, (str, int, float, bool)):
+                postings.append(self._by_meta.get((key, value), set()))
+            else:
+                predicates[key] = value
+        
+        ids = set.intersection(*sorted(postings, key=len)) if postings else set(self._index)
+        if not predicates or not ids:
+            return ids
+        metadata = self._read_metadata(list(ids))
+        return {vector_id for vector_id in ids if _matches(metadata[vector_id], predicates)}
+    
+    def query(self, query_vector: List[float], top_k: int, filter_dict: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        """Top-k stored vectors by cosine similarity, as {'id', 'score', 'metadata'} best first"""
+        candidates = self.ids_matching(filter_dict) if filter_dict else None
+        if not self._index or top_k <= 0 or candidates == set():
+            return []
+        
+        if np is not None:
+            scored = self._score_numpy(query_vector, top_k, candidates)
+        else:
+            scored = self._score_python(query_vector, top_k, candidates)
+        
+        metadata = self._read_metadata([vector_id for vector_id, _ in scored])
+        return [{'id': vector_id, 'score': score, 'metadata': metadata[vector_id]} for vector_id, score in scored]
+    
+    def _score_numpy(self, query_vector: List[float], top_k: int, candidates: Optional[Set[str]]) -> List[Tuple[str, float]]:
+        if self._matrix is None:
+            self._build_matrix()
+        q = np.asarray(query_vector, dtype=np.float32)
+        q /= np.linalg.norm(q) + 1e-12
+        
+        # Approximate scores from the int8 rows, widened a block at a time
+        matrix = self._matrix
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            end = start + _BLOCK_ROWS
+            np.dot(matrix[start:end].astype(np.float32), q, out=scores[start:end])
+        scores *= self._scales
+        
+        available = len(matrix)
+        if candidates is not None:
+            mask = np.fromiter((vector_id in candidates for vector_id in self._matrix_ids), dtype=bool, count=len(self._matrix_ids))
+            scores[~mask] = -np.inf
+            available = len(candidates)
+        
+        # Rescore a shortlist against the float32 rows so quantization can't reorder close results
+        top_k = min(top_k, available)
+        shortlist_size = min(top_k * _RESCORE_FACTOR, available)
+        shortlist = np.argpartition(-scores, shortlist_size - 1)[:shortlist_size]
+        exact = self._unit_rows(self._matrix_rows[shortlist]) @ q
+        order = np.argsort(-exact)[:top_k]
+        return [(self._matrix_ids[shortlist[i]], float(exact[i])) for i in order]
+    
+    def _unit_rows(self, row_numbers) -> "np.ndarray":
+        """Read rows from the vectors file, normalized to unit length"""
+        rows = np.memmap(self.vectors_path, dtype=np.float32, mode='r', shape=(self.row_count, self.dimension))
+        block = np.array(rows[row_numbers])
+        block /= np.linalg.norm(block, axis=1, keepdims=True) + 1e-12
+        return block
+    
+    def _build_matrix(self):
+        """Quantize the live rows to int8 at unit length, with one scale per row"""
+        row_numbers = np.fromiter((row for _, row in self._index.values()), dtype=np.int64, count=len(self._index))
+        matrix = np.empty((len(row_numbers), self.dimension), dtype=np.int8)
+        scales = np.empty(len(row_numbers), dtype=np.float32)
+        for start in range(0, len(row_numbers), _BLOCK_ROWS):
+            end = start + _BLOCK_ROWS
+            block = self._unit_rows(row_numbers[start:end])
+            peak = np.abs(block).max(axis=1) + 1e-12
+            matrix[start:end] = np.round(block * (127 / peak)[:, None])
+            scales[start:end] = peak / 127
+        
+        self._matrix_ids = list(self._index)
+        self._matrix_rows = row_numbers
+        self._matrix = matrix
+        self._scales = scales
+    
+    def _score_python(self, query_vector: List[float], top_k: int, candidates: Optional[Set[str]]) -> List[Tuple[str, float]]:
+        query_norm = math.sqrt(sum(x * x for x in query_vector)) or 1e-12
+        row_size = self.row_size
+        
+        def scores():
+            with mmap.mmap(self._vectors_file.fileno(), 0, access=mmap.ACCESS_READ) as rows:
+                for vector_id, (_, row) in self._index.items():
+                    if candidates is not None and vector_id not in candidates:
+                        continue
+                    values = array('f', rows[row * row_size:(row + 1) * row_size])
+                    norm = math.sqrt(sum(x * x for x in values)) or 1e-12
+                    yield sum(x * y for x, y in zip(values, query_vector)) / (norm * query_norm), vector_id
+        
+        return [(vector_id, score) for score, vector_id in heapq.nlargest(top_k, scores())]
+    
+    def _read_metadata(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not ids:
+            return {}
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as meta:
+            metadata = {}
+            for vector_id in ids:
+                offset = self._index[vector_id][0]
+                metadata[vector_id] = load_json(meta[offset:meta.find(b"\n", offset)]).get('metadata', {})
+            return metadata
+    
+    def _reindex(self, vector_id: str, metadata: Dict[str, Any]):
+        self._unindex(vector_id)
+        terms = _index_terms(metadata)
+        for term in terms:
+            self._by_meta[term].add(vector_id)
+        self._terms[vector_id] = terms
+    
+    def _unindex(self, vector_id: str):
+        for term in self._terms.pop(vector_id, ()):
+            ids = self._by_meta[term]
+            ids.discard(vector_id)
+            if not ids:
+                del self._by_meta[term]
+    
+    def iter_records(self, limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Yield live {'id', 'values', 'metadata'} records in insertion order"""
+        if not self._index:
+            return
+        row_size = self.row_size
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as meta, \
+                mmap.mmap(self._vectors_file.fileno(), 0, access=mmap.ACCESS_READ) as rows:
+            for count, (vector_id, (offset, row)) in enumerate(self._index.items()):
+                if limit is not None and count >= limit:
+                    break
+                record = load_json(meta[offset:meta.find(b"\n", offset)])
+                values = array('f', rows[row * row_size:(row + 1) * row_size])
+                yield {'id': vector_id, 'values': values.tolist(), 'metadata': record.get('metadata', {})}
+    
+    def _maybe_compact(self):
+        if self._garbage > _COMPACT_GARBAGE_RATIO * max(len(self._index), 1):
+            self.compact()
+    
+    def compact(self):
+        """Rewrite both files with only the latest line and row of each live vector"""
+        tmp_path = f"{self.path}.tmp"
+        tmp_vectors_path = f"{self.vectors_path}.tmp"
+        index = {}
+        with open(tmp_path, 'wb') as out, open(tmp_vectors_path, 'wb') as out_rows:
+            for row, record in enumerate(self.iter_records()):
+                index[record['id']] = (out.tell(), row)
+                out.write(dump_json({'id': record['id'], 'row': row, 'metadata': record['metadata']}) + b"\n")
+                out_rows.write(array('f', record['values']).tobytes())
+        
+        self.close()
+        os.replace(tmp_vectors_path, self.vectors_path)
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, 'a+b')
+        self._vectors_file = open(self.vectors_path, 'a+b')
+        self._index = index
+        self._garbage = 0
+        self._matrix = None
+    
+    def close(self):
+        self._file.close()
+        self._vectors_file.close()
@@ -1,85 +1,107 @@
+import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from notion_client import Client
 
 from lib.config import config
 from lib.data_models import IngestionLog
 
+# Status values are the same for every page, so share one read-only copy of each
+_STATUS_SUCCESS = {"status": {"name": "Success"}}
+_STATUS_FAILED = {"status": {"name": "Failed"}}
+
+def _title(content: str) -> Dict[str, Any]:
+    return {"title": [{"text": {"content": content}}]}
+
+def _rich_text(content: str) -> Dict[str, Any]:
+    return {"rich_text": [{"text": {"content": content}}]}
+
 class NotionLogger:
     def __init__(self):
+        config.validate_notion()
         self.client = Client(auth=config.notion_integration_secret)
         self.database_id = config.notion_database_id
+        
+        # Page properties waiting to be written; flushed in batches by size or age
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        
+        # Last successful ingestion, queried from Notion once and then kept current
+        # by this process's own logs
+        self._last_success: Optional[datetime] = None
+        self._last_success_loaded = False
     
     async def log_ingestion(self, log: IngestionLog):
-        """Log ingestion results to Notion database"""
+        """Queue ingestion results for the Notion database"""
+        if log.success:
+            self._last_success = max(self._last_success or log.timestamp, log.timestamp)
+        
+        try:
+            self._pending.append(self._build_properties(log))
+        except Exception as e:
+            print(f"Error logging to Notion: {e}")
+            return
+        
+        if len(self._pending) >= config.notion_log_batch_size:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        await asyncio.sleep(config.notion_log_flush_seconds)
+        await self.flush()
+    
+    async def flush(self):
+        """Write all queued logs to Notion, creating the pages concurrently"""
+        # An explicit flush makes the pending timed one unnecessary
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+            self._flush_task = None
+        
+        batch, self._pending = self._pending, []
+        if batch:
+            await asyncio.gather(*(asyncio.to_thread(self._create_page, properties) for properties in batch))
+    
+    def _create_page(self, properties: Dict[str, Any]):
         try:
-            # Map to your exact Notion schema
-            properties = {
-                "Embeddings": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": f"{log.operation} - {log.timestamp.strftime('%Y-%m-%d %H:%M:%S')}"
-                            }
-                        }
-                    ]
-                },
-                "Run ID": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": f"{log.operation}_{log.timestamp.strftime('%Y%m%d_%H%M%S')}"
-                            }
-                        }
-                    ]
-                },
-                "Run Status": {
-                    "status": {
-                        "name": "Success" if log.success else "Failed"
-                    }
-                },
-                "Start Time": {
-                    "date": {
-                        "start": log.timestamp.isoformat()
-                    }
-                },
-                "Channels Checked": {
-                    "number": log.channels_processed
-                },
-                "Messages Embedded": {
-                    "number": log.embeddings_generated
-                },
-                "Duration": {
-                    "number": round(log.duration_seconds, 2)
-                }
-            }
-            
-            # Add errors if any
-            if log.errors:
-                properties["Errors"] = {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": "; ".join(log.errors)
-                            }
-                        }
-                    ]
-                }
-            
-            # Create the page
             self.client.pages.create(
                 parent={"database_id": self.database_id},
                 properties=properties
             )
-            
         except Exception as e:
             print(f"Error logging to Notion: {e}")
     
+    def _build_properties(self, log: IngestionLog) -> Dict[str, Any]:
+        """Map an ingestion log to the database's page properties"""
+        timestamp = log.timestamp
+        # Map to your exact Notion schema
+        properties = {
+            "Embeddings": _title(f"{log.operation} - {timestamp.strftime('%Y-%m-%d %H:%M:%S')}"),
+            "Run ID": _rich_text(f"{log.operation}_{timestamp.strftime('%Y%m%d_%H%M%S')}"),
+            "Run Status": _STATUS_SUCCESS if log.success else _STATUS_FAILED,
+            "Start Time": {"date": {"start": timestamp.isoformat()}},
+            "Channels Checked": {"number": log.channels_processed},
+            "Messages Embedded": {"number": log.embeddings_generated},
+            "Duration": {"number": round(log.duration_seconds, 2)}
+        }
+        
+        # Add errors if any
+        if log.errors:
+            properties["Errors"] = _rich_text("; ".join(log.errors))
+        
+        return properties
+    
     async def get_last_successful_ingestion(self) -> Optional[datetime]:
         """Get timestamp of last successful ingestion"""
+        if self._last_success_loaded:
+            return self._last_success
+        
+        # Queued logs may include the latest success
+        await self.flush()
         try:
             # Query for last successful ingestion
-            response = self.client.databases.query(
+            response = await asyncio.to_thread(
+                self.client.databases.query,
                 database_id=self.database_id,
                 filter={
                     "property": "Run Status",
@@ -98,18 +120,20 @@ class NotionLogger:
             
             if response['results']:
                 timestamp_str = response['results'][0]['properties']['Start Time']['date']['start']
-                return datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+                last_success = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00'))
+                self._last_success = max(self._last_success or last_success, last_success)
+            self._last_success_loaded = True
             
         except Exception as e:
             print(f"Error getting last ingestion from Notion: {e}")
         
-        return None
+        return self._last_success
     
     async def create_database_schema(self):
         """Create or verify the database schema"""
         try:
             # Get database to verify it exists
-            database = self.client.databases.retrieve(database_id=self.database_id)
+            database = await asyncio.to_thread(self.client.databases.retrieve, database_id=self.database_id)
             print(f"Using Notion database: {database.get('title', [{}])[0].get('text', {}).get('content', 'Unknown')}")
             
         except Exception as e:
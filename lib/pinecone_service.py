@@ -1,9 +1,39 @@
-import json
-import os
+import asyncio
+import time
 from typing import List, Dict, Any, Optional
-from datetime import datetime
+
+import httpx
 
 from lib.config import config
+from lib.local_vector_store import LocalVectorStore
+
+# Shared pooled HTTP client for Pinecone data-plane queries, so concurrent
+# searches reuse TCP+TLS connections instead of handshaking per query
+_http_client: Optional[httpx.AsyncClient] = None
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Get the shared Pinecone HTTP client, creating it on first use"""
+    global _http_client
+    if _http_client is None:
+        try:
+            import h2  # noqa: F401 - HTTP/2 support is optional
+            http2 = True
+        except ImportError:
+            http2 = False
+        
+        _http_client = httpx.AsyncClient(
+            http2=http2,
+            timeout=httpx.Timeout(10.0),
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        )
+    return _http_client
+
+async def close_http_client():
+    """Close the shared Pinecone HTTP client"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
 
 class PineconeService:
     def __init__(self):
@@ -15,20 +45,22 @@ class PineconeService:
                 from pinecone import Pinecone
                 self.pc = Pinecone(api_key=config.pinecone_api_key)
                 self.index = self.pc.Index(config.pinecone_index_name)
+                # Data-plane host for direct async requests over the shared HTTP client
+                self.data_plane_url = f"https://{self.pc.describe_index(config.pinecone_index_name).host}"
                 print(f"✅ Connected to Pinecone index: {config.pinecone_index_name}")
             except Exception as e:
                 print(f"❌ Pinecone connection failed: {e}")
                 print("Falling back to local storage...")
                 self.use_pinecone = False
         
+        # Index stats are polled by health/stats checks; memoize them briefly
+        self._index_stats_cache: Optional[Dict[str, Any]] = None
+        self._index_stats_expires_at = 0.0
+        self._index_stats_ttl = 10  # seconds
+        
         if not self.use_pinecone:
             # Fallback to local file storage
-            self.storage_file = "pinecone_vectors.json"
-            self.storage_dir = os.path.dirname(self.storage_file)
-            
-            # Create storage directory if it doesn't exist
-            if self.storage_dir and not os.path.exists(self.storage_dir):
-                os.makedirs(self.storage_dir)
+            self.local_store = LocalVectorStore()
     
     def is_index_empty(self) -> bool:
         """Check if the index is empty"""
@@ -40,22 +72,34 @@ class PineconeService:
                 print(f"Error checking Pinecone index: {e}")
                 return True
         else:
-            try:
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    return len(data.get('vectors', [])) == 0
-            except (FileNotFoundError, json.JSONDecodeError):
-                return True
+            return len(self.local_store) == 0
+    
+    async def get_index_stats(self) -> Dict[str, Any]:
+        """Get index statistics (cached for a few seconds)"""
+        now = time.monotonic()
+        if self._index_stats_cache is not None and now < self._index_stats_expires_at:
+            return self._index_stats_cache
+        
+        stats = await self._fetch_index_stats()
+        self._index_stats_cache = stats
+        self._index_stats_expires_at = now + self._index_stats_ttl
+        return stats
     
-    def get_index_stats(self) -> Dict[str, Any]:
-        """Get index statistics"""
+    async def _fetch_index_stats(self) -> Dict[str, Any]:
+        """Fetch index statistics from Pinecone or local storage"""
         if self.use_pinecone:
             try:
-                stats = self.index.describe_index_stats()
+                response = await _get_http_client().post(
+                    f"{self.data_plane_url}/describe_index_stats",
+                    json={},
+                    headers={'Api-Key': config.pinecone_api_key}
+                )
+                response.raise_for_status()
+                stats = response.json()
                 return {
-                    'total_vector_count': stats.total_vector_count,
-                    'dimension': stats.dimension,
-                    'index_fullness': stats.index_fullness,
+                    'total_vector_count': stats.get('totalVectorCount', 0),
+                    'dimension': stats.get('dimension', config.embedding_dimensions),
+                    'index_fullness': stats.get('indexFullness', 0.0),
                     'last_update': 'Real-time'
                 }
             except Exception as e:
@@ -67,24 +111,12 @@ class PineconeService:
                     'last_update': 'Error'
                 }
         else:
-            try:
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    
-                vectors = data.get('vectors', [])
-                return {
-                    'total_vector_count': len(vectors),
-                    'dimension': config.embedding_dimensions,
-                    'index_fullness': 0.0,
-                    'last_update': data.get('last_update', 'Never')
-                }
-            except (FileNotFoundError, json.JSONDecodeError):
-                return {
-                    'total_vector_count': 0,
-                    'dimension': config.embedding_dimensions,
-                    'index_fullness': 0.0,
-                    'last_update': 'Never'
-                }
+            return {
+                'total_vector_count': len(self.local_store),
+                'dimension': config.embedding_dimensions,
+                'index_fullness': 0.0,
+                'last_update': self.local_store.last_update or 'Never'
+            }
     
     async def upsert_embeddings(self, embeddings_data: List[tuple]):
         """Upsert embeddings into the index"""
@@ -99,12 +131,17 @@ class PineconeService:
                         'metadata': metadata
                     })
                 
-                # Upsert to Pinecone in batches
+                # Upsert to Pinecone in batches, several in flight at once; the sync
+                # client runs in worker threads so the event loop stays free
                 batch_size = 100
-                for i in range(0, len(vectors), batch_size):
-                    batch = vectors[i:i + batch_size]
-                    self.index.upsert(vectors=batch)
-                    
+                semaphore = asyncio.Semaphore(config.pinecone_upsert_concurrency)
+                
+                async def send(batch):
+                    async with semaphore:
+                        await asyncio.to_thread(self.index.upsert, vectors=batch)
+                
+                await asyncio.gather(*(send(vectors[i:i + batch_size]) for i in range(0, len(vectors), batch_size)))
+                
                 print(f"✅ Upserted {len(vectors)} vectors to Pinecone")
                 
             except Exception as e:
@@ -112,45 +149,9 @@ class PineconeService:
                 raise
         else:
             try:
-                # Load existing data
-                try:
-                    with open(self.storage_file, 'r') as f:
-                        data = json.load(f)
-                except (FileNotFoundError, json.JSONDecodeError):
-                    data = {'vectors': [], 'last_update': None}
-                
-                # Convert new embeddings to storage format
-                vectors = data.get('vectors', [])
-                existing_ids = {v['id'] for v in vectors}
-                
-                new_vectors = []
-                for embedding_id, embedding_vector, metadata in embeddings_data:
-                    vector_data = {
-                        'id': embedding_id,
-                        'values': embedding_vector,
-                        'metadata': metadata
-                    }
-                    new_vectors.append(vector_data)
-                
-                # Remove duplicates and add new vectors
-                for new_vector in new_vectors:
-                    if new_vector['id'] not in existing_ids:
-                        vectors.append(new_vector)
-                    else:
-                        # Update existing vector
-                        for i, existing_vector in enumerate(vectors):
-                            if existing_vector['id'] == new_vector['id']:
-                                vectors[i] = new_vector
-                                break
-                
-                # Save updated data
-                data['vectors'] = vectors
-                data['last_update'] = datetime.utcnow().isoformat()
-                
-                with open(self.storage_file, 'w') as f:
-                    json.dump(data, f, indent=2)
-                    
-                print(f"✅ Saved {len(new_vectors)} vectors to local storage")
+                # Appends one line per vector; replaced vectors are dropped at compaction
+                self.local_store.upsert(embeddings_data)
+                print(f"✅ Saved {len(embeddings_data)} vectors to local storage")
                 
             except Exception as e:
                 print(f"❌ Error saving to local storage: {e}")
@@ -161,43 +162,15 @@ class PineconeService:
         if self.use_pinecone:
             try:
                 # Use Pinecone delete API
-                self.index.delete(filter=filter_dict)
+                await asyncio.to_thread(self.index.delete, filter=filter_dict)
                 print(f"✅ Deleted vectors matching filter from Pinecone")
             except Exception as e:
                 print(f"❌ Error deleting from Pinecone: {e}")
                 raise
         else:
             try:
-                # Load existing data
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                
-                vectors = data.get('vectors', [])
-                original_count = len(vectors)
-                
-                # Filter vectors (simple implementation)
-                filtered_vectors = []
-                for vector in vectors:
-                    metadata = vector.get('metadata', {})
-                    should_delete = True
-                    
-                    for key, value in filter_dict.items():
-                        if key not in metadata or metadata[key] != value:
-                            should_delete = False
-                            break
-                    
-                    if not should_delete:
-                        filtered_vectors.append(vector)
-                
-                # Update data
-                data['vectors'] = filtered_vectors
-                data['last_update'] = datetime.utcnow().isoformat()
-                
-                # Save to file
-                with open(self.storage_file, 'w') as f:
-                    json.dump(data, f, indent=2)
-                
-                deleted_count = original_count - len(filtered_vectors)
+                # Matching ids come from the store's in-memory metadata index
+                deleted_count = self.local_store.delete(self.local_store.ids_matching(filter_dict))
                 print(f"Deleted {deleted_count} vectors from local storage")
                 
             except Exception as e:
@@ -209,41 +182,39 @@ class PineconeService:
         """Query for similar vectors"""
         if self.use_pinecone:
             try:
-                # Use Pinecone query API
+                # Use Pinecone query API over the shared async HTTP client
                 query_params = {
                     'vector': query_embedding,
-                    'top_k': top_k,
-                    'include_metadata': True
+                    'topK': top_k,
+                    'includeMetadata': True
                 }
                 if filter_dict:
                     query_params['filter'] = filter_dict
-                    
-                response = self.index.query(**query_params)
-                return response.matches
+                
+                response = await _get_http_client().post(
+                    f"{self.data_plane_url}/query",
+                    json=query_params,
+                    headers={'Api-Key': config.pinecone_api_key}
+                )
+                response.raise_for_status()
+                return response.json().get('matches', [])
                 
             except Exception as e:
                 print(f"❌ Error querying Pinecone: {e}")
                 return []
         else:
             try:
-                # Load data from file
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                
-                vectors = data.get('vectors', [])
-                
-                # Simple similarity search (basic implementation for deployment)
-                # In production, you'd use proper vector similarity search
-                results = []
-                for i, vector in enumerate(vectors[:top_k]):  # Return first top_k for simplicity
-                    results.append({
-                        'id': vector['id'],
-                        'score': 0.8 - (i * 0.1),  # Mock similarity score
-                        'metadata': vector.get('metadata', {})
-                    })
-                
-                return results
+                # Cosine similarity over every stored vector, filtered by metadata
+                return self.local_store.query(query_embedding, top_k, filter_dict)
                 
             except Exception as e:
                 print(f"Error querying vectors: {e}")
-                return []
\ No newline at end of file
+                return []
+    
+    async def query_similar_batch(self, query_embeddings: List[List[float]], top_k: int = 10,
+                                  filter_dict: Optional[dict] = None) -> List[List[dict]]:
+        """Query for similar vectors for several embeddings at once, aligned with input order"""
+        return list(await asyncio.gather(*(
+            self.query_similar(query_embedding, top_k=top_k, filter_dict=filter_dict)
+            for query_embedding in query_embeddings
+        )))
\ No newline at end of file
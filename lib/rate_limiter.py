@@ -101,8 +101,12 @@ class EnhancedRateLimiter:
                     # Apply rate limiting before making the call
                     await self.wait_if_needed("slack", 0, endpoint=method_name)
                     
-                    # Make the API call
-                    response = call(**kwargs)
+                    # Make the API call; the Slack WebClient blocks, so run it in a
+                    # worker thread to let concurrent calls overlap
+                    if asyncio.iscoroutinefunction(call):
+                        response = await call(**kwargs)
+                    else:
+                        response = await asyncio.to_thread(call, **kwargs)
                     
                     # Check for errors in the response
                     response.validate()
@@ -1,13 +1,29 @@
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timezone
+import atexit
 import json
+import logging
+import logging.handlers
 import os
+import queue
 import re
 from pathlib import Path
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
 from lib.rate_limiter import rate_limiter
 
+try:
+    # orjson encodes and decodes several times faster than the stdlib json module
+    import orjson
+except ImportError:
+    orjson = None
+
+# Slack markup patterns, compiled once for the per-message cleaning path
+_USER_MENTION_RE = re.compile(r"<@(.*?)>")
+_CHANNEL_MENTION_RE = re.compile(r"<#(.*?)\|(.*?)>")
+_ANGLE_BRACKET_RE = re.compile(r"<(.*?)>")
+_SPECIAL_CATCHALL_RE = re.compile(r"<!([^|]+)\|([^>]+)>")
+
 def chunk_text(text: str, max_chunk_size: int, chunk_overlap: int = 0) -> List[str]:
     """Split text into chunks with optional overlap"""
     if len(text) <= max_chunk_size:
@@ -35,13 +51,27 @@ def chunk_text(text: str, max_chunk_size: int, chunk_overlap: int = 0) -> List[s
     
     return chunks
 
+def dump_json(obj: Any, indent: bool = False) -> bytes:
+    """Encode obj as UTF-8 JSON, using orjson when installed; unsupported types are written with str()"""
+    if orjson is not None:
+        # numpy arrays (e.g. embedding vectors) are encoded natively rather than via str()
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=str, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=str).encode("utf-8")
+
+def load_json(data: bytes) -> Any:
+    """Decode UTF-8 JSON, using orjson when installed (its errors subclass json.JSONDecodeError)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 def save_state(state: Dict[str, Any], filename: str) -> None:
     """Save state to a JSON file"""
     try:
         state_file = Path(filename)
         state_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(state_file, 'w') as f:
-            json.dump(state, f, indent=2, default=str)
+        with open(state_file, 'wb') as f:
+            f.write(dump_json(state, indent=True))
     except Exception as e:
         print(f"Error saving state to {filename}: {e}")
 
@@ -50,12 +80,29 @@ def load_state(filename: str) -> Dict[str, Any]:
     try:
         state_file = Path(filename)
         if state_file.exists():
-            with open(state_file, 'r') as f:
-                return json.load(f)
+            with open(state_file, 'rb') as f:
+                return load_json(f.read())
     except Exception as e:
         print(f"Error loading state from {filename}: {e}")
     return {}
 
+def setup_logging(log_level: str):
+    """Setup logging configuration"""
+    # Handlers only enqueue records; formatting and stream writes happen on
+    # the listener thread so request handlers and the ingestion loop never block on stderr
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    
+    log_queue = queue.Queue(-1)
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    
+    logging.basicConfig(
+        level=getattr(logging, log_level),
+        handlers=[logging.handlers.QueueHandler(log_queue)]
+    )
+
 def get_current_utc_time() -> datetime:
     """Get current UTC time"""
     return datetime.now(timezone.utc)
@@ -135,18 +182,24 @@ class SlackTextCleaner:
     
     async def _replace_user_ids_with_names(self, message: str) -> str:
         """Replace user IDs with actual usernames"""
-        # Find user IDs in the message
-        user_ids = re.findall(r"<@(.*?)>", message)
+        # Find the distinct user IDs in the message
+        user_ids = set(_USER_MENTION_RE.findall(message))
+        if not user_ids:
+            return message
         
-        # Replace each user ID with username
+        # Resolve each user ID once
+        names = {}
         for user_id in user_ids:
             try:
-                user_name = await self._get_slack_name(user_id)
-                message = message.replace(f"<@{user_id}>", f"@{user_name}")
+                names[user_id] = await self._get_slack_name(user_id)
             except Exception as e:
                 print(f"Unable to replace user ID {user_id} with username: {e}")
         
-        return message
+        # Rewrite every resolved mention in a single pass
+        return _USER_MENTION_RE.sub(
+            lambda match: f"@{names[match.group(1)]}" if match.group(1) in names else match.group(0),
+            message
+        )
     
     async def index_clean(self, message: str) -> str:
         """
@@ -178,20 +231,12 @@ class SlackTextCleaner:
     @staticmethod
     def replace_tags_basic(message: str) -> str:
         """Replace user tags with basic format to prevent tagging"""
-        user_ids = re.findall(r"<@(.*?)>", message)
-        for user_id in user_ids:
-            message = message.replace(f"<@{user_id}>", f"@{user_id}")
-        return message
+        return _USER_MENTION_RE.sub(lambda match: f"@{match.group(1)}", message)
     
     @staticmethod
     def replace_channels_basic(message: str) -> str:
         """Replace channel mentions with basic format"""
-        channel_matches = re.findall(r"<#(.*?)\|(.*?)>", message)
-        for channel_id, channel_name in channel_matches:
-            message = message.replace(
-                f"<#{channel_id}|{channel_name}>", f"#{channel_name}"
-            )
-        return message
+        return _CHANNEL_MENTION_RE.sub(lambda match: f"#{match.group(2)}", message)
     
     @staticmethod
     def replace_special_mentions(message: str) -> str:
@@ -204,7 +249,7 @@ class SlackTextCleaner:
     @staticmethod
     def replace_links(message: str) -> str:
         """Replace Slack links with display text"""
-        possible_link_matches = re.findall(r"<(.*?)>", message)
+        possible_link_matches = _ANGLE_BRACKET_RE.findall(message)
         for possible_link in possible_link_matches:
             if not possible_link:
                 continue
@@ -221,8 +266,7 @@ class SlackTextCleaner:
     @staticmethod
     def replace_special_catchall(message: str) -> str:
         """Replace special pattern <!something|another-thing> with another-thing"""
-        pattern = r"<!([^|]+)\|([^>]+)>"
-        return re.sub(pattern, r"\2", message)
+        return _SPECIAL_CATCHALL_RE.sub(r"\2", message)
     
     @staticmethod
     def add_zero_width_whitespace_after_tag(message: str) -> str:
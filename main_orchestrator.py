@@ -14,6 +14,7 @@ import logging
 from typing import Optional
 
 from lib.config import config
+from lib.utils import setup_logging
 from search.service import create_search_service
 from mcp.server import create_mcp_server, create_mcp_remote_server
 # Removed LLM agent import - agents should be on client side
@@ -94,8 +95,13 @@ class SlackChatterOrchestrator:
                 host="0.0.0.0",
                 port=port,
                 log_level="info",
-                access_log=True,
-                loop="asyncio"
+                # The request middleware already logs every request
+                access_log=False,
+                # uvloop/httptools when installed, stdlib fallbacks otherwise. A
+                # single worker: OAuth tokens and MCP sessions live in process memory
+                loop="auto",
+                http="auto",
+                workers=1
             )
             
         except ImportError as e:
@@ -166,7 +172,13 @@ class SlackChatterOrchestrator:
                 host="0.0.0.0",
                 port=port,
                 log_level="debug",
-                access_log=True
+                # The request middleware already logs every request
+                access_log=False,
+                # uvloop/httptools when installed, stdlib fallbacks otherwise. A
+                # single worker: OAuth tokens and MCP sessions live in process memory
+                loop="auto",
+                http="auto",
+                workers=1
             )
             
         except ImportError as e:
@@ -334,14 +346,6 @@ Examples:
     return parser
 
 
-def setup_logging(log_level: str):
-    """Setup logging configuration"""
-    logging.basicConfig(
-        level=getattr(logging, log_level),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-
-
 def main():
     """Main entry point"""
     parser = create_argument_parser()
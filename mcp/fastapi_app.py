@@ -8,6 +8,7 @@ import json
 import logging
 import secrets
 import hashlib
+import hmac
 import base64
 import time
 from typing import Dict, List, Optional
@@ -17,8 +18,18 @@ from datetime import datetime, timedelta
 from fastapi import FastAPI, Request, Response, HTTPException, Header, Query, Form
 from fastapi.responses import JSONResponse, HTMLResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+try:
+    # orjson serializes responses several times faster than the stdlib encoder
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as DefaultJSONResponse
+except ImportError:
+    DefaultJSONResponse = JSONResponse
 
 from mcp.server import MCPStreamableHTTPServer, create_mcp_streamable_server
+from lib.embedding_service import close_openai_client
+from lib.pinecone_service import close_http_client
 
 
 app = FastAPI(
@@ -26,7 +37,8 @@ app = FastAPI(
     description="MCP Streamable HTTP Standard (March 2025) - Single endpoint with session headers",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=DefaultJSONResponse
 )
 
 # CORS middleware for cross-origin requests
@@ -38,6 +50,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger responses (search results are mostly repetitive text)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # Global MCP streamable server instance
 mcp_streamable_server: Optional[MCPStreamableHTTPServer] = None
 _search_service = None
@@ -52,6 +67,10 @@ OAUTH_CONFIG = {
     "access_token_expiry": 86400,  # 24 hours
 }
 
+# Client credentials encoded once for constant-time comparison
+_CLIENT_ID_BYTES = OAUTH_CONFIG["client_id"].encode("utf-8")
+_CLIENT_SECRET_BYTES = OAUTH_CONFIG["client_secret"].encode("utf-8")
+
 # In-memory storage (use Redis/database in production)
 authorization_codes: Dict[str, Dict] = {}
 access_tokens: Dict[str, Dict] = {}
@@ -75,6 +94,13 @@ async def startup_event():
     logging.info("MCP Streamable HTTP Server (March 2025 Standard) started")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled outbound connections on shutdown"""
+    await close_http_client()
+    await close_openai_client()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with information about the MCP server"""
@@ -105,32 +131,46 @@ async def root():
     }
 
 
+def _client_ip(request: Request) -> str:
+    """Client address straight from the ASGI scope, without building an Address object"""
+    client = request.scope.get("client")
+    return client[0] if client else "unknown"
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     """Log all incoming requests for debugging"""
-    logging.info(f"Incoming request: {request.method} {request.url.path} from {request.client.host if request.client else 'unknown'}")
-    logging.info(f"All headers: {dict(request.headers)}")
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    if logging.root.isEnabledFor(logging.DEBUG):
+        logging.debug("Request headers: %s", dict(request.headers))
     response = await call_next(request)
-    logging.info(f"Response status: {response.status_code}")
+    scope = request.scope
+    logging.info(
+        "%s %s from %s -> %d (%.1f ms)",
+        scope["method"], scope["path"], _client_ip(request),
+        response.status_code, (loop.time() - start) * 1000
+    )
     return response
 
 
 # Helper functions for OAuth 2.1
+def _pkce_s256(code_verifier: str) -> bytes:
+    """S256 code challenge for a verifier, as unpadded base64url bytes"""
+    digest = hashlib.sha256(code_verifier.encode('utf-8')).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b'=')
+
+
 def generate_pkce_challenge():
     """Generate PKCE code verifier and challenge"""
-    code_verifier = base64.urlsafe_b64encode(secrets.token_bytes(32)).decode('utf-8').rstrip('=')
-    code_challenge = base64.urlsafe_b64encode(
-        hashlib.sha256(code_verifier.encode('utf-8')).digest()
-    ).decode('utf-8').rstrip('=')
-    return code_verifier, code_challenge
+    # token_urlsafe already yields unpadded base64url text
+    code_verifier = secrets.token_urlsafe(32)
+    return code_verifier, _pkce_s256(code_verifier).decode('ascii')
 
 
 def verify_pkce_challenge(code_verifier: str, code_challenge: str):
     """Verify PKCE code challenge"""
-    expected_challenge = base64.urlsafe_b64encode(
-        hashlib.sha256(code_verifier.encode('utf-8')).digest()
-    ).decode('utf-8').rstrip('=')
-    return secrets.compare_digest(expected_challenge, code_challenge)
+    return hmac.compare_digest(_pkce_s256(code_verifier), code_challenge.encode('utf-8'))
 
 
 def generate_token():
@@ -138,6 +178,15 @@ def generate_token():
     return secrets.token_urlsafe(32)
 
 
+def verify_client_credentials(client_id: str, client_secret: str):
+    """Validate OAuth client credentials in constant time"""
+    # Compare both fields unconditionally so timing does not reveal which one failed
+    id_ok = hmac.compare_digest(client_id.encode("utf-8"), _CLIENT_ID_BYTES)
+    secret_ok = hmac.compare_digest(client_secret.encode("utf-8"), _CLIENT_SECRET_BYTES)
+    if not (id_ok and secret_ok):
+        raise HTTPException(status_code=401, detail="Invalid client credentials")
+
+
 def is_token_expired(token_data: Dict) -> bool:
     """Check if a token is expired"""
     return datetime.utcnow() > token_data["expires_at"]
@@ -229,8 +278,7 @@ async def oauth_token(
     """OAuth 2.1 token endpoint"""
     
     # Validate client credentials
-    if client_id != OAUTH_CONFIG["client_id"] or client_secret != OAUTH_CONFIG["client_secret"]:
-        raise HTTPException(status_code=401, detail="Invalid client credentials")
+    verify_client_credentials(client_id, client_secret)
     
     if grant_type == "authorization_code":
         # Authorization code flow
@@ -346,8 +394,7 @@ async def oauth_introspect(
     """OAuth 2.1 token introspection endpoint"""
     
     # Validate client credentials
-    if client_id != OAUTH_CONFIG["client_id"] or client_secret != OAUTH_CONFIG["client_secret"]:
-        raise HTTPException(status_code=401, detail="Invalid client credentials")
+    verify_client_credentials(client_id, client_secret)
     
     if token in access_tokens:
         token_data = access_tokens[token]
@@ -372,8 +419,7 @@ async def oauth_revoke(
     """OAuth 2.1 token revocation endpoint"""
     
     # Validate client credentials
-    if client_id != OAUTH_CONFIG["client_id"] or client_secret != OAUTH_CONFIG["client_secret"]:
-        raise HTTPException(status_code=401, detail="Invalid client credentials")
+    verify_client_credentials(client_id, client_secret)
     
     # Revoke access token
     if token in access_tokens:
@@ -441,13 +487,8 @@ async def debug_tokens():
         "note": "⚠️ This endpoint is for development debugging only!"
     }
 
-def validate_oauth_token(authorization_header: str) -> Dict:
-    """Validate OAuth 2.1 access token"""
-    if not authorization_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    
-    token = authorization_header[7:]  # Remove "Bearer " prefix
-    
+def validate_oauth_token(token: str) -> Dict:
+    """Validate OAuth 2.1 access token (already stripped of its "Bearer " prefix)"""
     if token not in access_tokens:
         raise HTTPException(status_code=401, detail="Invalid access token")
     
@@ -459,13 +500,8 @@ def validate_oauth_token(authorization_header: str) -> Dict:
     return token_data
 
 
-def validate_api_key(authorization_header: str) -> Dict:
-    """Validate API key - delegate to MCP server for validation"""
-    if not authorization_header.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header format")
-    
-    token = authorization_header[7:]  # Remove "Bearer " prefix
-    
+def validate_api_key(token: str) -> Dict:
+    """Validate API key (already stripped of its "Bearer " prefix) - delegate to MCP server for validation"""
     # Check if this looks like an API key
     if not token.startswith("mcp_key_"):
         raise HTTPException(status_code=401, detail="Invalid API key format")
@@ -514,14 +550,12 @@ async def mcp_endpoint(
         # Check if it's an OAuth token or API key
         if token.startswith("mcp_key_"):
             # API key authentication - let MCP server handle validation
-            token_data = validate_api_key(authorization)
+            token_data = validate_api_key(token)
             auth_type = "api_key"
-            logging.info(f"API key authentication attempt for key: {token[:16]}...")
         else:
             # OAuth token authentication
-            token_data = validate_oauth_token(authorization)
+            token_data = validate_oauth_token(token)
             auth_type = "oauth"
-            logging.info(f"OAuth authentication successful with scopes: {token_data['scope']}")
         
         # Log all incoming headers for debugging
         all_headers = dict(request.headers)
@@ -558,9 +592,7 @@ async def mcp_endpoint(
         body_str = body.decode('utf-8')
         
         # Log the complete request for debugging
-        logging.info(f"Processing MCP request from {request.client.host if request.client else 'unknown'}")
-        logging.info(f"Request headers prepared: {headers}")
-        logging.info(f"Request body preview: {body_str[:100]}...")
+        logging.debug("Processing MCP request, body preview: %.100s...", body_str)
         
         response = await mcp_streamable_server.handle_mcp_request(
             method="POST",
@@ -572,13 +604,16 @@ async def mcp_endpoint(
         # Add session header to response if session was created/updated
         if response and "session_info" in response:
             session_id = response["session_info"]["session_id"]
-            return JSONResponse(
+            return DefaultJSONResponse(
                 content=response,
                 headers={"Mcp-Session-Id": session_id}
             )
         
         return response
         
+    except HTTPException:
+        # Authentication and request errors already carry the right status
+        raise
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON in request body")
     except Exception as e:
@@ -758,25 +793,6 @@ async def api_docs_example():
     return examples
 
 
-# Development helper endpoint
-@app.get("/dev/api-key")
-async def get_development_api_key():
-    """Get development API key (remove in production)"""
-    if not mcp_streamable_server:
-        raise HTTPException(status_code=503, detail="Server not initialized")
-    
-    # Get the first API key (development key)
-    api_keys = list(mcp_streamable_server.api_keys.keys())
-    if api_keys:
-        return {
-            "api_key": api_keys[0],
-            "note": "This is for development only. Remove this endpoint in production.",
-            "usage": f"Authorization: Bearer {api_keys[0]}"
-        }
-    
-    return {"error": "No API keys available"}
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8080) 
\ No newline at end of file
@@ -9,9 +9,7 @@ import os
 import yaml
 from typing import Dict, Optional, Any
 from dataclasses import dataclass
-from openai import AsyncOpenAI
-
-from lib.config import config
+from lib.embedding_service import get_openai_client
 
 
 @dataclass
@@ -25,7 +23,7 @@ class LLMSlackSearchAgent:
     """Pure LLM-powered agent for search query enhancement"""
     
     def __init__(self):
-        self.client = AsyncOpenAI(api_key=config.openai_api_key)
+        self.client = get_openai_client()
         self.logger = logging.getLogger(__name__)
         
         # Load configuration from YAML
@@ -10,25 +10,44 @@ import logging
 import sys
 import uuid
 import secrets
-from typing import Any, Dict, List, Optional, Union, AsyncGenerator
+from typing import Annotated, Dict, List, Optional, Union, AsyncGenerator
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 import hashlib
 import hmac
 
+from pydantic import AfterValidator, BaseModel, Field, StringConstraints, ValidationError
+
 from lib.config import config
+from search.service import SearchResult, date_to_epoch
 
 
-@dataclass
-class SearchResult:
-    """Represents a search result from Slack messages"""
-    message_id: str
-    text: str
-    user_name: str
-    channel_name: str
-    timestamp: str
-    similarity_score: float
-    metadata: Dict[str, Any]
+# Enforced by pydantic-core and published as the JSON Schema pattern for date arguments
+_DATE_PATTERN = r"^\d{4}-\d{2}-\d{2}$"
+
+# Search tool argument constraints, checked by pydantic-core rather than Python code
+QueryText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=1000)]
+# Dates are parsed once here, to epoch seconds at UTC midnight, so impossible dates are invalid params
+DateText = Annotated[str, StringConstraints(pattern=_DATE_PATTERN), AfterValidator(date_to_epoch)]
+
+
+class SearchFilterArguments(BaseModel):
+    """Arguments shared by the search tools"""
+    top_k: int = 10  # Clamped to 1-50 by the search service
+    channel_filter: Optional[str] = None
+    user_filter: Optional[str] = None
+    date_from: Optional[DateText] = None
+    date_to: Optional[DateText] = None
+
+
+class SearchArguments(SearchFilterArguments):
+    """Arguments for search_slack_messages"""
+    query: QueryText
+
+
+class SearchBatchArguments(SearchFilterArguments):
+    """Arguments for search_slack_messages_batch"""
+    queries: List[QueryText] = Field(min_length=1, max_length=config.search_batch_max_queries)
 
 
 class MCPJsonRpcError(Exception):
@@ -217,17 +236,63 @@ class PureMCPServer:
                         "date_from": {
                             "type": "string",
                             "description": "Filter messages from this date (YYYY-MM-DD)",
-                            "pattern": "^\\d{4}-\\d{2}-\\d{2}$"
+                            "pattern": _DATE_PATTERN
                         },
                         "date_to": {
                             "type": "string",
                             "description": "Filter messages to this date (YYYY-MM-DD)",
-                            "pattern": "^\\d{4}-\\d{2}-\\d{2}$"
+                            "pattern": _DATE_PATTERN
                         }
                     },
                     "required": ["query"]
                 }
             },
+            {
+                "name": "search_slack_messages_batch",
+                "description": "Run several semantic searches over Slack messages in one call",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "queries": {
+                            "type": "array",
+                            "description": "Search queries for finding relevant messages",
+                            "items": {
+                                "type": "string",
+                                "minLength": 1,
+                                "maxLength": 1000
+                            },
+                            "minItems": 1,
+                            "maxItems": config.search_batch_max_queries
+                        },
+                        "top_k": {
+                            "type": "integer",
+                            "description": "Number of results to return per query (1-50)",
+                            "minimum": 1,
+                            "maximum": 50,
+                            "default": 10
+                        },
+                        "channel_filter": {
+                            "type": "string",
+                            "description": "Filter results by channel name"
+                        },
+                        "user_filter": {
+                            "type": "string",
+                            "description": "Filter results by user name"
+                        },
+                        "date_from": {
+                            "type": "string",
+                            "description": "Filter messages from this date (YYYY-MM-DD)",
+                            "pattern": _DATE_PATTERN
+                        },
+                        "date_to": {
+                            "type": "string",
+                            "description": "Filter messages to this date (YYYY-MM-DD)",
+                            "pattern": _DATE_PATTERN
+                        }
+                    },
+                    "required": ["queries"]
+                }
+            },
             {
                 "name": "get_slack_channels",
                 "description": "Get list of available Slack channels",
@@ -262,6 +327,8 @@ class PureMCPServer:
         # Route to appropriate handler
         if tool_name == "search_slack_messages":
             result = await self._handle_search(arguments)
+        elif tool_name == "search_slack_messages_batch":
+            result = await self._handle_search_batch(arguments)
         elif tool_name == "get_slack_channels":
             result = await self._handle_get_channels(arguments)
         elif tool_name == "get_search_stats":
@@ -277,63 +344,96 @@ class PureMCPServer:
             raise MCPJsonRpcError(-32603, "Search service not available")
         
         # Extract and validate parameters
-        query = arguments.get("query", "")
-        if not query.strip():
-            raise MCPJsonRpcError(-32602, "Invalid params", {"message": "Search query cannot be empty"})
-        
-        top_k = arguments.get("top_k", 10)
-        channel_filter = arguments.get("channel_filter")
-        user_filter = arguments.get("user_filter")
-        date_from = arguments.get("date_from")
-        date_to = arguments.get("date_to")
+        args = self._parse_arguments(SearchArguments, arguments)
         
         try:
             # Perform search
             results = await self.search_service.search(
-                query=query,
-                top_k=top_k,
-                channel_filter=channel_filter,
-                user_filter=user_filter,
-                date_from=date_from,
-                date_to=date_to
+                query=args.query,
+                top_k=args.top_k,
+                channel_filter=args.channel_filter,
+                user_filter=args.user_filter,
+                date_from=args.date_from,
+                date_to=args.date_to
             )
             
             # Format results for MCP
-            if not results:
-                return {
-                    "content": [
-                        {
-                            "type": "text",
-                            "text": f"No messages found matching '{query}'"
-                        }
-                    ]
-                }
-            
-            # Create formatted response
-            response_text = f"Found {len(results)} messages matching '{query}':\n\n"
+            return {
+                "content": [
+                    {
+                        "type": "text",
+                        "text": self._format_search_results(args.query, results)
+                    }
+                ]
+            }
             
-            for i, result in enumerate(results, 1):
-                response_text += f"**Result {i}:**\n"
-                response_text += f"Channel: #{result.channel_name}\n"
-                response_text += f"User: @{result.user_name}\n"
-                response_text += f"Time: {result.timestamp}\n"
-                response_text += f"Relevance: {result.similarity_score:.2f}\n"
-                response_text += f"Message: {result.text}\n"
-                response_text += "---\n"
+        except Exception as e:
+            self.logger.error(f"Search error: {str(e)}")
+            raise MCPJsonRpcError(-32603, "Search failed", {"details": str(e)})
+    
+    async def _handle_search_batch(self, arguments: Dict) -> Dict:
+        """Handle batch search requests"""
+        if not self.search_service:
+            raise MCPJsonRpcError(-32603, "Search service not available")
+        
+        # Extract and validate parameters
+        args = self._parse_arguments(SearchBatchArguments, arguments)
+        
+        try:
+            # Perform all searches in one batch
+            batch_results = await self.search_service.search_batch(
+                queries=args.queries,
+                top_k=args.top_k,
+                channel_filter=args.channel_filter,
+                user_filter=args.user_filter,
+                date_from=args.date_from,
+                date_to=args.date_to
+            )
             
+            # One content item per query, in request order
             return {
                 "content": [
                     {
                         "type": "text",
-                        "text": response_text
+                        "text": self._format_search_results(query, results)
                     }
+                    for query, results in zip(args.queries, batch_results)
                 ]
             }
             
         except Exception as e:
-            self.logger.error(f"Search error: {str(e)}")
+            self.logger.error(f"Batch search error: {str(e)}")
             raise MCPJsonRpcError(-32603, "Search failed", {"details": str(e)})
     
+    def _parse_arguments(self, model: type, arguments: Dict) -> BaseModel:
+        """Validate tool arguments against model, mapping failures to JSON-RPC invalid params"""
+        try:
+            return model.model_validate(arguments)
+        except ValidationError as e:
+            message = "; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            raise MCPJsonRpcError(-32602, "Invalid params", {"message": message})
+    
+    def _format_search_results(self, query: str, results: List[SearchResult]) -> str:
+        """Format search results as text for MCP responses"""
+        if not results:
+            return f"No messages found matching '{query}'"
+        
+        # Create formatted response
+        response_text = f"Found {len(results)} messages matching '{query}':\n\n"
+        
+        for i, result in enumerate(results, 1):
+            response_text += f"**Result {i}:**\n"
+            response_text += f"Channel: #{result.channel_name}\n"
+            response_text += f"User: @{result.user_name}\n"
+            response_text += f"Time: {result.timestamp}\n"
+            response_text += f"Relevance: {result.similarity_score:.2f}\n"
+            response_text += f"Message: {result.text}\n"
+            response_text += "---\n"
+        
+        return response_text
+    
     async def _handle_get_channels(self, arguments: Dict) -> Dict:
         """Handle get channels request"""
         if not self.search_service:
@@ -686,7 +786,7 @@ class MCPStreamableHTTPServer:
         if method == "tools/call":
             tool_name = request_data.get("params", {}).get("name")
             
-            if tool_name == "search_slack_messages" and "mcp:search" not in session_scopes:
+            if tool_name in ("search_slack_messages", "search_slack_messages_batch") and "mcp:search" not in session_scopes:
                 raise ValueError("Insufficient scope: mcp:search required")
             elif tool_name == "get_slack_channels" and "mcp:channels" not in session_scopes:
                 raise ValueError("Insufficient scope: mcp:channels required")
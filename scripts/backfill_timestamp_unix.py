@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+One-off backfill of the numeric timestamp_unix metadata field.
+Date-filtered searches range over timestamp_unix, which only vectors ingested after it was
+introduced carry. Incremental refreshes never revisit older messages, so this script derives
+the field from each vector's stored ISO timestamp instead of re-ingesting.
+Safe to re-run: only vectors still missing the field are touched.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+import sys
+import os
+
+# Add project root to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.config import config
+from lib.pinecone_service import PineconeService
+
+# Vectors still missing the field; Pinecone returns at most this many per query with metadata
+MISSING_FILTER = {"timestamp_unix": {"$exists": False}}
+PAGE_SIZE = 1000
+
+# How often, and how long apart, to re-query while updates are still propagating
+STALE_PAGE_RETRIES = 10
+STALE_PAGE_DELAY = 3  # seconds
+
+
+def timestamp_unix(metadata: dict):
+    """Epoch seconds for a vector's ISO timestamp, or None if it has none"""
+    timestamp = metadata.get("timestamp")
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)  # Ingestion always stored UTC
+    return int(parsed.timestamp())
+
+
+def backfill_pinecone(index) -> tuple:
+    """Set timestamp_unix on every Pinecone vector missing it, a page at a time"""
+    # Any non-zero vector works: the filter, not the ranking, selects the page
+    probe = [1.0] + [0.0] * (config.embedding_dimensions - 1)
+    seen = set()
+    unparseable = set()
+    updated = skipped = 0
+    stale_pages = 0
+
+    while True:
+        response = index.query(vector=probe, top_k=PAGE_SIZE, filter=MISSING_FILTER, include_metadata=True)
+        if not response.matches:
+            return updated, skipped
+
+        # Updates are eventually consistent, so a page can repeat vectors already handled;
+        # wait for them to drop out of the filter rather than stopping early
+        matches = [match for match in response.matches if match.id not in seen]
+        if not matches:
+            if len(response.matches) < PAGE_SIZE and all(match.id in unparseable for match in response.matches):
+                # Only vectors without a usable timestamp are left, and they never leave the filter
+                return updated, skipped
+            stale_pages += 1
+            if stale_pages > STALE_PAGE_RETRIES:
+                raise RuntimeError(
+                    f"Vectors still missing timestamp_unix after {STALE_PAGE_RETRIES} retries; re-run to resume"
+                )
+            time.sleep(STALE_PAGE_DELAY)
+            continue
+        stale_pages = 0
+
+        for match in matches:
+            seen.add(match.id)
+            value = timestamp_unix(match.metadata or {})
+            if value is None:
+                unparseable.add(match.id)
+                skipped += 1
+                continue
+            index.update(id=match.id, set_metadata={"timestamp_unix": value})
+            updated += 1
+        print(f"   Updated {updated} vectors so far...")
+
+
+def backfill_local(store) -> tuple:
+    """Rewrite local vectors missing timestamp_unix with the field added"""
+    missing = store.ids_matching(MISSING_FILTER)
+    records = []
+    skipped = 0
+    for record in store.iter_records():
+        if record["id"] not in missing:
+            continue
+        value = timestamp_unix(record["metadata"])
+        if value is None:
+            skipped += 1
+            continue
+        records.append((record["id"], record["values"], {**record["metadata"], "timestamp_unix": value}))
+
+    store.upsert(records)
+    return len(records), skipped
+
+
+async def backfill_timestamp_unix():
+    """Add timestamp_unix to stored vectors that predate it"""
+
+    print("🔄 Backfilling timestamp_unix metadata")
+    print("=" * 60)
+
+    pinecone_service = PineconeService()
+    if pinecone_service.use_pinecone:
+        print(f"Index: {config.pinecone_index_name}")
+        updated, skipped = await asyncio.to_thread(backfill_pinecone, pinecone_service.index)
+    else:
+        print("Pinecone not configured, backfilling local vector storage")
+        updated, skipped = backfill_local(pinecone_service.local_store)
+
+    print(f"✅ Added timestamp_unix to {updated} vectors")
+    if skipped:
+        print(f"⚠️  Skipped {skipped} vectors without a parseable timestamp")
+
+if __name__ == "__main__":
+    asyncio.run(backfill_timestamp_unix())
@@ -26,7 +26,7 @@ async def verify_ingestion():
     pinecone_service = PineconeService()
     
     # Get index statistics
-    stats = pinecone_service.get_index_stats()
+    stats = await pinecone_service.get_index_stats()
     print(f"📊 Index Statistics:")
     print(f"   Total vectors: {stats.get('total_vector_count', 0)}")
     print(f"   Dimension: {stats.get('dimension', 0)}")
@@ -4,9 +4,12 @@ Handles vector search operations independently from ingestion
 """
 
 import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Optional, Any
-from datetime import datetime
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Union
+from datetime import datetime, timezone
 from dataclasses import dataclass
 
 from lib.embedding_service import EmbeddingService
@@ -26,6 +29,41 @@ class SearchResult:
     metadata: Dict[str, Any]
 
 
+_SECONDS_PER_DAY = 86400
+
+
+def date_to_epoch(date: Union[str, int]) -> int:
+    """Convert a YYYY-MM-DD date to epoch seconds at UTC midnight; epoch seconds pass through"""
+    if isinstance(date, int):
+        return date
+    return int(datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+
+def _build_filter(channel_filter: Optional[str] = None,
+                  user_filter: Optional[str] = None,
+                  date_from: Optional[Union[str, int]] = None,
+                  date_to: Optional[Union[str, int]] = None) -> Optional[Dict[str, Any]]:
+    """Build filter dictionary for vector search"""
+    filter_dict = {}
+    
+    if channel_filter:
+        filter_dict["channel_name"] = channel_filter
+    
+    if user_filter:
+        filter_dict["user_name"] = user_filter
+    
+    if date_from or date_to:
+        # Pinecone range operators only apply to numbers, so filter on epoch seconds
+        date_filter = {}
+        if date_from:
+            date_filter["$gte"] = date_to_epoch(date_from)
+        if date_to:
+            date_filter["$lt"] = date_to_epoch(date_to) + _SECONDS_PER_DAY  # Include the whole end day
+        filter_dict["timestamp_unix"] = date_filter
+    
+    return filter_dict or None
+
+
 class SlackSearchService:
     """Dedicated service for searching Slack messages"""
     
@@ -43,12 +81,18 @@ class SlackSearchService:
         self._stats_cache = None
         self._cache_timestamp = None
         self._cache_ttl = 300  # 5 minutes cache TTL
+        
+        # Short-lived cache of full search results; clear_cache() bumps the
+        # generation so entries from before a refresh are never served
+        self._result_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._result_cache_lock = asyncio.Lock()
+        self._cache_generation = 0
     
     async def search(self, query: str, top_k: int = 10, 
                     channel_filter: Optional[str] = None,
                     user_filter: Optional[str] = None,
-                    date_from: Optional[str] = None,
-                    date_to: Optional[str] = None) -> List[SearchResult]:
+                    date_from: Optional[Union[str, int]] = None,
+                    date_to: Optional[Union[str, int]] = None) -> List[SearchResult]:
         """
         Search for similar messages using semantic search
         
@@ -57,8 +101,8 @@ class SlackSearchService:
             top_k: Number of results to return (1-50)
             channel_filter: Filter by channel name
             user_filter: Filter by user name
-            date_from: Filter messages from this date (YYYY-MM-DD)
-            date_to: Filter messages to this date (YYYY-MM-DD)
+            date_from: Filter messages from this date (YYYY-MM-DD, or epoch seconds at UTC midnight)
+            date_to: Filter messages to this date (YYYY-MM-DD, or epoch seconds at UTC midnight)
             
         Returns:
             List of SearchResult objects
@@ -72,16 +116,21 @@ class SlackSearchService:
             
             self.logger.info(f"Searching for: '{query}' (top_k={top_k})")
             
-            # Generate embedding for the query
-            query_embedding = await self.embedding_service._generate_single_embedding(query)
-            
             # Build filter for the query
-            filter_dict = self._build_filter(
-                channel_filter=channel_filter,
-                user_filter=user_filter,
-                date_from=date_from,
-                date_to=date_to
-            )
+            filter_dict = _build_filter(channel_filter, user_filter, date_from, date_to)
+            
+            # Serve burst-identical searches without another Pinecone round-trip.
+            # The filter is fully determined by its inputs, so they serve as its
+            # canonical form in the key without serializing filter_dict
+            filter_key = (channel_filter or None, user_filter or None, date_from or None, date_to or None)
+            cache_key = self._result_cache_key(query, filter_key, top_k)
+            cached_results = await self._get_cached_results(cache_key)
+            if cached_results is not None:
+                self.logger.info(f"Search served from cache: returned {len(cached_results)} results")
+                return cached_results
+            
+            # Generate embedding for the query (cached, and coalesced with concurrent searches)
+            query_embedding = await self.embedding_service.embed_query(query)
             
             # Query vector database
             results = await self.pinecone_service.query_similar(
@@ -91,18 +140,8 @@ class SlackSearchService:
             )
             
             # Convert to SearchResult objects
-            search_results = []
-            for result in results:
-                metadata = result.get("metadata", {})
-                search_results.append(SearchResult(
-                    message_id=result.get("id", ""),
-                    text=metadata.get("text", ""),
-                    user_name=metadata.get("user_name", ""),
-                    channel_name=metadata.get("channel_name", ""),
-                    timestamp=metadata.get("timestamp", ""),
-                    similarity_score=result.get("score", 0.0),
-                    metadata=metadata
-                ))
+            search_results = self._to_search_results(results)
+            await self._set_cached_results(cache_key, search_results)
             
             self.logger.info(f"Search completed: returned {len(search_results)} results")
             return search_results
@@ -111,28 +150,106 @@ class SlackSearchService:
             self.logger.error(f"Search failed: {str(e)}")
             raise
     
-    def _build_filter(self, channel_filter: Optional[str] = None,
-                     user_filter: Optional[str] = None,
-                     date_from: Optional[str] = None,
-                     date_to: Optional[str] = None) -> Optional[Dict[str, Any]]:
-        """Build filter dictionary for vector search"""
-        filter_dict = {}
-        
-        if channel_filter:
-            filter_dict["channel_name"] = channel_filter
+    async def search_batch(self, queries: List[str], top_k: int = 10,
+                           channel_filter: Optional[str] = None,
+                           user_filter: Optional[str] = None,
+                           date_from: Optional[Union[str, int]] = None,
+                           date_to: Optional[Union[str, int]] = None) -> List[List[SearchResult]]:
+        """
+        Search for several queries at once, sharing one embedding call and
+        issuing the vector queries concurrently
         
-        if user_filter:
-            filter_dict["user_name"] = user_filter
+        Args:
+            queries: Search query texts (up to config.search_batch_max_queries)
+            top_k: Number of results to return per query (1-50)
+            channel_filter: Filter by channel name
+            user_filter: Filter by user name
+            date_from: Filter messages from this date (YYYY-MM-DD, or epoch seconds at UTC midnight)
+            date_to: Filter messages to this date (YYYY-MM-DD, or epoch seconds at UTC midnight)
         
-        if date_from or date_to:
-            date_filter = {}
-            if date_from:
-                date_filter["$gte"] = date_from
-            if date_to:
-                date_filter["$lte"] = date_to
-            filter_dict["timestamp"] = date_filter
+        Returns:
+            One list of SearchResult objects per query, in input order
+        """
+        try:
+            # Validate inputs
+            if not queries:
+                raise ValueError("At least one search query is required")
+            if len(queries) > config.search_batch_max_queries:
+                raise ValueError(f"At most {config.search_batch_max_queries} queries can be searched at once")
+            if any(not query or not query.strip() for query in queries):
+                raise ValueError("Search query cannot be empty")
+            
+            top_k = max(1, min(top_k, 50))  # Clamp between 1 and 50
+            
+            self.logger.info(f"Batch searching {len(queries)} queries (top_k={top_k})")
+            
+            # Generate embeddings for all queries in one request
+            query_embeddings = await self.embedding_service._generate_batch_embedding(queries)
+            if not query_embeddings:
+                raise RuntimeError("Failed to generate query embeddings")
+            
+            # Build filter for the queries
+            filter_dict = _build_filter(channel_filter, user_filter, date_from, date_to)
+            
+            # Query vector database
+            batch_results = await self.pinecone_service.query_similar_batch(
+                query_embeddings=query_embeddings,
+                top_k=top_k,
+                filter_dict=filter_dict
+            )
+            
+            search_results = [self._to_search_results(results) for results in batch_results]
+            
+            self.logger.info(f"Batch search completed: returned {sum(len(r) for r in search_results)} results")
+            return search_results
         
-        return filter_dict if filter_dict else None
+        except Exception as e:
+            self.logger.error(f"Batch search failed: {str(e)}")
+            raise
+    
+    def _result_cache_key(self, query: str, filter_key: tuple, top_k: int) -> tuple:
+        """Build the result cache key from the stripped query, canonical filter and top_k"""
+        query_hash = hashlib.sha1(query.strip().encode("utf-8")).hexdigest()
+        return (self._cache_generation, query_hash, filter_key, top_k)
+    
+    async def _get_cached_results(self, cache_key: tuple) -> Optional[List[SearchResult]]:
+        """Return cached results for cache_key if present and not expired"""
+        async with self._result_cache_lock:
+            entry = self._result_cache.get(cache_key)
+            if entry is None:
+                return None
+            
+            expires_at, results = entry
+            if expires_at <= time.monotonic():
+                del self._result_cache[cache_key]
+                return None
+            
+            self._result_cache.move_to_end(cache_key)
+            return results
+    
+    async def _set_cached_results(self, cache_key: tuple, results: List[SearchResult]):
+        """Store results for cache_key, evicting the least recently used entry when full"""
+        async with self._result_cache_lock:
+            self._result_cache[cache_key] = (time.monotonic() + config.search_result_cache_ttl_seconds, results)
+            self._result_cache.move_to_end(cache_key)
+            if len(self._result_cache) > config.search_result_cache_size:
+                self._result_cache.popitem(last=False)
+    
+    def _to_search_results(self, results: List[Dict[str, Any]]) -> List[SearchResult]:
+        """Convert raw vector matches to SearchResult objects"""
+        result_cls = SearchResult
+        return [
+            result_cls(
+                result.get("id", ""),
+                (metadata := result.get("metadata") or {}).get("text", ""),
+                metadata.get("user_name", ""),
+                metadata.get("channel_name", ""),
+                metadata.get("timestamp", ""),
+                result.get("score", 0.0),
+                metadata
+            )
+            for result in results
+        ]
     
     async def get_channels(self) -> List[str]:
         """Get list of available channels"""
@@ -181,7 +298,7 @@ class SlackSearchService:
                     return self._stats_cache
             
             # Get stats from pinecone service
-            pinecone_stats = self.pinecone_service.get_index_stats()
+            pinecone_stats = await self.pinecone_service.get_index_stats()
             
             # Get additional stats
             channels = await self.get_channels()
@@ -192,7 +309,9 @@ class SlackSearchService:
                 "dimension": pinecone_stats.get("dimension", 1536),
                 "index_fullness": pinecone_stats.get("index_fullness", 0.0),
                 "last_refresh": self._get_last_refresh_time(),
-                "status": "operational" if pinecone_stats.get("total_vector_count", 0) > 0 else "empty"
+                "status": "operational" if pinecone_stats.get("total_vector_count", 0) > 0 else "empty",
+                "embedding_batching": self.embedding_service.get_batch_metrics(),
+                "query_embedding_cache": self.embedding_service.get_query_cache_metrics()
             }
             
             # Cache the result
@@ -274,6 +393,8 @@ class SlackSearchService:
         self._channels_cache = None
         self._stats_cache = None
         self._cache_timestamp = None
+        self._cache_generation += 1
+        self._result_cache.clear()
         self.logger.info("Cache cleared")
 
 
@@ -60,15 +60,12 @@ class MCPOAuthTester:
         """Generate PKCE code verifier and challenge"""
         print("🔐 Generating PKCE values...")
         
-        # Generate code verifier
-        self.code_verifier = base64.urlsafe_b64encode(
-            secrets.token_bytes(32)
-        ).decode('utf-8').rstrip('=')
+        # Generate code verifier (token_urlsafe already yields unpadded base64url text)
+        self.code_verifier = secrets.token_urlsafe(32)
         
         # Generate code challenge
-        code_challenge = base64.urlsafe_b64encode(
-            hashlib.sha256(self.code_verifier.encode('utf-8')).digest()
-        ).decode('utf-8').rstrip('=')
+        digest = hashlib.sha256(self.code_verifier.encode('ascii')).digest()
+        code_challenge = base64.urlsafe_b64encode(digest).rstrip(b'=').decode('ascii')
         
         print(f"✅ PKCE generated!")
         print(f"   Code verifier: {self.code_verifier[:20]}...")
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Config validates core settings at import; tests never reach OpenAI
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,55 @@
+"""
+Filters built by the search service, evaluated by local vector storage
+"""
+
+import pytest
+
+from lib.config import config
+from lib.local_vector_store import LocalVectorStore
+from search.service import _build_filter, date_to_epoch
+
+
+def _vector(axis: int):
+    values = [0.0] * config.embedding_dimensions
+    values[axis] = 1.0
+    return values
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "vectors.jsonl"), str(tmp_path / "vectors.f32"), legacy_path=None)
+    store.upsert([
+        ("m1", _vector(0), {"channel_name": "general", "user_name": "ana", "timestamp_unix": date_to_epoch("2024-03-10") + 3600}),
+        ("m2", _vector(1), {"channel_name": "general", "user_name": "ben", "timestamp_unix": date_to_epoch("2024-03-12")}),
+        ("m3", _vector(2), {"channel_name": "random", "user_name": "ana", "timestamp_unix": date_to_epoch("2023-01-01")}),
+    ])
+    yield store
+    store.close()
+
+
+def _ids(store, **filters):
+    return {match["id"] for match in store.query(_vector(0), 10, _build_filter(**filters))}
+
+
+def test_equality_filters(store):
+    assert _ids(store, channel_filter="general") == {"m1", "m2"}
+    assert _ids(store, channel_filter="general", user_filter="ana") == {"m1"}
+    assert _ids(store, channel_filter="missing") == set()
+
+
+def test_date_range_filters(store):
+    assert _ids(store, date_from="2024-03-01") == {"m1", "m2"}
+    assert _ids(store, date_to="2024-03-10") == {"m1", "m3"}
+    assert _ids(store, date_from="2024-03-10", date_to="2024-03-11") == {"m1"}
+    assert _ids(store, channel_filter="random", date_from="2024-01-01") == set()
+
+
+def test_delete_by_operator_filter(store):
+    assert store.delete(store.ids_matching({"timestamp_unix": {"$lt": date_to_epoch("2024-01-01")}})) == 1
+    assert {record["id"] for record in store.iter_records()} == {"m1", "m2"}
+
+
+def test_in_and_exists_operators(store):
+    assert store.ids_matching({"user_name": {"$in": ["ben", "cy"]}}) == {"m2"}
+    assert store.ids_matching({"user_name": {"$nin": ["ana"]}}) == {"m2"}
+    assert store.ids_matching({"timestamp_unix": {"$exists": False}}) == set()
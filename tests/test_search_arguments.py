@@ -0,0 +1,21 @@
+"""
+Search tool argument validation
+"""
+
+import pytest
+from pydantic import ValidationError
+
+from mcp.server import SearchArguments
+from search.service import date_to_epoch
+
+
+def test_dates_parse_to_epoch_seconds():
+    args = SearchArguments(query="deploy", date_from="2024-03-10", date_to="2024-03-11")
+    assert args.date_from == date_to_epoch("2024-03-10")
+    assert args.date_to == date_to_epoch("2024-03-11")
+
+
+@pytest.mark.parametrize("date", ["2024-13-45", "2024-02-30", "03/10/2024"])
+def test_invalid_dates_are_rejected(date):
+    with pytest.raises(ValidationError):
+        SearchArguments(query="deploy", date_from=date)